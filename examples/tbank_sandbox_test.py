@@ -21,7 +21,7 @@ load_dotenv()
 # Добавление путей для импорта
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.data.tbank_data_provider import TBankDataProvider
+from src.data.tbank_data_provider import TBankDataProvider, install_uvloop
 from src.trading.tbank_broker import TBankBroker
 
 
@@ -37,6 +37,7 @@ async def test_data_provider():
         print("   Создайте файл .env и добавьте: TINKOFF_TOKEN=ваш_токен")
         return
     
+    provider = None
     try:
         # Создание провайдера
         provider = TBankDataProvider(token=token, sandbox=True)
@@ -59,6 +60,14 @@ async def test_data_provider():
         price = await provider.get_current_price('SBER')
         print(f"   Текущая цена: {price:.2f} ₽")
         
+        # Поток последних цен: пока он активен, цена берется без запроса к API
+        print("\n📡 Подписка на поток цен SBER...")
+        await provider.start_price_stream(['SBER'])
+        await asyncio.sleep(5)
+        print(f"   Поток активен: {provider.is_streaming}")
+        price = await provider.get_current_price('SBER')
+        print(f"   Текущая цена: {price:.2f} ₽")
+        
         # Получение исторических данных
         print("\n📈 Получение исторических данных (последние 30 дней)...")
         data = await provider.get_historical_data('SBER', period='1mo', interval='day')
@@ -77,17 +86,20 @@ async def test_data_provider():
         orderbook = await provider.get_orderbook('SBER', depth=5)
         if orderbook:
             print("   BID (покупка):")
-            for bid in orderbook['bids'][:5]:
-                print(f"     {bid['price']:.2f} ₽ x {bid['quantity']}")
+            for price, quantity in zip(orderbook['bid_price'][:5], orderbook['bid_qty'][:5]):
+                print(f"     {price:.2f} ₽ x {quantity}")
             print("   ASK (продажа):")
-            for ask in orderbook['asks'][:5]:
-                print(f"     {ask['price']:.2f} ₽ x {ask['quantity']}")
+            for price, quantity in zip(orderbook['ask_price'][:5], orderbook['ask_qty'][:5]):
+                print(f"     {price:.2f} ₽ x {quantity}")
         
         print("\n✅ Тест провайдера данных завершен успешно!")
         
     except Exception as e:
         print(f"\n❌ Ошибка в тесте провайдера: {e}")
         logger.exception(e)
+    finally:
+        if provider is not None:
+            await provider.close()
 
 
 async def test_broker():
@@ -102,72 +114,68 @@ async def test_broker():
         return
     
     try:
-        # Создание брокера
-        broker = TBankBroker(token=token, sandbox=True)
-        print("✅ Брокер создан")
-        
-        # Инициализация
-        await broker.initialize()
-        status = broker.get_status()
-        print(f"✅ Брокер инициализирован:")
-        print(f"   Режим: {status['mode']}")
-        print(f"   Account ID: {status['account_id']}")
-        print(f"   Инструментов загружено: {status['instruments_loaded']}")
-        
-        # Получение портфеля
-        print("\n💼 Получение портфеля...")
-        portfolio = await broker.get_portfolio()
-        print(f"   Общая стоимость: {portfolio['total_amount']:.2f} ₽")
-        print(f"   Ожидаемая доходность: {portfolio['expected_yield']:.2f} ₽")
-        print(f"   Позиций: {len(portfolio['positions'])}")
-        
-        if portfolio['positions']:
-            print("\n   Текущие позиции:")
-            for pos in portfolio['positions'][:5]:
-                print(f"     {pos['ticker']}: {pos['quantity']} шт @ {pos['average_price']:.2f} ₽")
-        
-        # Тестовое размещение рыночного ордера (ЗАКОММЕНТИРОВАНО для безопасности)
-        # Раскомментируйте, если хотите протестировать размещение ордеров
-        
-        # print("\n📝 Размещение тестового ордера на покупку 1 лота SBER...")
-        # order = await broker.place_order(
-        #     ticker='SBER',
-        #     quantity=1,
-        #     direction='buy',
-        #     order_type='market'
-        # )
-        # if order:
-        #     print(f"✅ Ордер размещен:")
-        #     print(f"   Order ID: {order['order_id']}")
-        #     print(f"   Ticker: {order['ticker']}")
-        #     print(f"   Direction: {order['direction']}")
-        #     print(f"   Quantity: {order['quantity']}")
-        #     print(f"   Status: {order['status']}")
-        #     
-        #     # Проверка статуса ордера
-        #     await asyncio.sleep(2)  # Ждем исполнения
-        #     state = await broker.get_order_state(order['order_id'])
-        #     if state:
-        #         print(f"\n   Статус ордера:")
-        #         print(f"     Execution status: {state['execution_status']}")
-        #         print(f"     Lots executed: {state['lots_executed']}")
-        #         print(f"     Executed price: {state['executed_price']:.2f} ₽")
-        
-        # Получение операций
-        print("\n📋 Получение последних операций...")
-        from datetime import datetime, timedelta
-        operations = await broker.get_operations(
-            from_date=datetime.now() - timedelta(days=30),
-            to_date=datetime.now()
-        )
-        print(f"   Найдено операций за последние 30 дней: {len(operations)}")
-        
-        if operations:
-            print("\n   Последние операции:")
-            for op in operations[-5:]:
-                print(f"     {op['date']}: {op['type']} - {op['payment']:.2f} ₽")
-        
-        print("\n✅ Тест брокера завершен успешно!")
+        # Создание и инициализация брокера
+        async with TBankBroker(token=token, sandbox=True) as broker:
+            status = broker.get_status()
+            print(f"✅ Брокер инициализирован:")
+            print(f"   Режим: {status['mode']}")
+            print(f"   Account ID: {status['account_id']}")
+            print(f"   Инструментов загружено: {status['instruments_loaded']}")
+        
+            # Получение портфеля
+            print("\n💼 Получение портфеля...")
+            portfolio = await broker.get_portfolio()
+            print(f"   Общая стоимость: {portfolio['total_amount']:.2f} ₽")
+            print(f"   Ожидаемая доходность: {portfolio['expected_yield']:.2f} ₽")
+            print(f"   Позиций: {len(portfolio['positions'])}")
+        
+            if portfolio['positions']:
+                print("\n   Текущие позиции:")
+                for pos in portfolio['positions'][:5]:
+                    print(f"     {pos['ticker']}: {pos['quantity']} шт @ {pos['average_price']:.2f} ₽")
+        
+            # Тестовое размещение рыночного ордера (ЗАКОММЕНТИРОВАНО для безопасности)
+            # Раскомментируйте, если хотите протестировать размещение ордеров
+        
+            # print("\n📝 Размещение тестового ордера на покупку 1 лота SBER...")
+            # order = await broker.place_order(
+            #     ticker='SBER',
+            #     quantity=1,
+            #     direction='buy',
+            #     order_type='market'
+            # )
+            # if order:
+            #     print(f"✅ Ордер размещен:")
+            #     print(f"   Order ID: {order['order_id']}")
+            #     print(f"   Ticker: {order['ticker']}")
+            #     print(f"   Direction: {order['direction']}")
+            #     print(f"   Quantity: {order['quantity']}")
+            #     print(f"   Status: {order['status']}")
+            #     
+            #     # Проверка статуса ордера
+            #     await asyncio.sleep(2)  # Ждем исполнения
+            #     state = await broker.get_order_state(order['order_id'])
+            #     if state:
+            #         print(f"\n   Статус ордера:")
+            #         print(f"     Execution status: {state['execution_status']}")
+            #         print(f"     Lots executed: {state['lots_executed']}")
+            #         print(f"     Executed price: {state['executed_price']:.2f} ₽")
+        
+            # Получение операций
+            print("\n📋 Получение последних операций...")
+            from datetime import datetime, timedelta
+            operations = await broker.get_operations(
+                from_date=datetime.now() - timedelta(days=30),
+                to_date=datetime.now()
+            )
+            print(f"   Найдено операций за последние 30 дней: {len(operations)}")
+        
+            if operations:
+                print("\n   Последние операции:")
+                for op in operations[-5:]:
+                    print(f"     {op['date']}: {op['type']} - {op['payment']:.2f} ₽")
+        
+            print("\n✅ Тест брокера завершен успешно!")
         
         # Закрытие счета (ЗАКОММЕНТИРОВАНО для безопасности)
         # print("\n🗑️  Закрытие sandbox счета...")
@@ -238,6 +246,7 @@ if __name__ == '__main__':
     )
     
     # Запуск тестов
+    install_uvloop()
     asyncio.run(main())
 
 
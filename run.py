@@ -8,6 +8,7 @@ import sys
 import os
 import argparse
 import atexit
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from loguru import logger
@@ -39,6 +40,7 @@ except ImportError:
 from src.core.investment_system import InvestmentSystem
 from src.utils.config_selector import ConfigSelector
 from src.utils.interactive_console import start_interactive_console
+from src.utils.logger_config import name_contains
 
 
 def setup_logging(config_path: str = "config/main.yaml"):
@@ -82,7 +84,7 @@ def setup_logging(config_path: str = "config/main.yaml"):
             session_dir / "trading.log",
             level="INFO",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            filter=lambda record: "trading" in record["name"].lower(),
+            filter=partial(name_contains, ("trading",)),
             encoding="utf-8",
             delay=True  # Файл создается только при первой записи, проходящей через фильтр
         )
@@ -91,7 +93,7 @@ def setup_logging(config_path: str = "config/main.yaml"):
             session_dir / "neural_networks.log",
             level="INFO",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            filter=lambda record: "neural" in record["name"].lower(),
+            filter=partial(name_contains, ("neural",)),
             encoding="utf-8",
             delay=True  # Файл создается только при первой записи, проходящей через фильтр
         )
@@ -101,7 +103,7 @@ def setup_logging(config_path: str = "config/main.yaml"):
             session_dir / "gui_application.log",
             level="INFO",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            filter=lambda record: "gui" in record["name"].lower() or "web" in record["name"].lower(),
+            filter=partial(name_contains, ("gui", "web")),
             encoding="utf-8",
             delay=True  # Файл создается только при первой записи, проходящей через фильтр
         )
@@ -111,7 +113,7 @@ def setup_logging(config_path: str = "config/main.yaml"):
             session_dir / "backtesting.log",
             level="INFO",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            filter=lambda record: "backtest" in record["name"].lower(),
+            filter=partial(name_contains, ("backtest",)),
             encoding="utf-8",
             delay=True  # Файл создается только при первой записи, проходящей через фильтр
         )
@@ -121,7 +123,7 @@ def setup_logging(config_path: str = "config/main.yaml"):
             session_dir / "web_launcher.log",
             level="INFO",
             format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {message}",
-            filter=lambda record: "web_launcher" in record["name"].lower(),
+            filter=partial(name_contains, ("web_launcher",)),
             encoding="utf-8",
             delay=True  # Файл создается только при первой записи, проходящей через фильтр
         )
@@ -555,6 +557,10 @@ def main():
         logger.error("❌ Проверка окружения не пройдена")
         sys.exit(1)
     
+    # Быстрый цикл событий для T-Bank API (если установлен uvloop)
+    from src.data.tbank_data_provider import install_uvloop
+    install_uvloop()
+    
     # Выбор режима работы
     try:
         if args.mode == 'train':
@@ -144,7 +144,7 @@ async def check_cloud_sync_status():
         for symbol in test_symbols:
             orderbook = await provider.get_orderbook(symbol, depth=5)
             if orderbook:
-                print(f"✅ Стакан для {symbol}: {len(orderbook.get('bids', []))} bids, {len(orderbook.get('asks', []))} asks")
+                print(f"✅ Стакан для {symbol}: {len(orderbook.get('bid_price', []))} bids, {len(orderbook.get('ask_price', []))} asks")
                 print(f"  💰 Спред: {orderbook.get('spread', 0):.2f} ₽ ({orderbook.get('spread_percent', 0):.2f}%)")
             else:
                 print(f"❌ Стакан для {symbol} недоступен")
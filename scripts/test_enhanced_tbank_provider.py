@@ -100,8 +100,10 @@ async def test_enhanced_tbank_provider():
             if orderbook:
                 print(f"  ✅ Получен стакан глубиной {orderbook.get('depth', 0)}")
                 print(f"  💰 Спред: {orderbook.get('spread', 0):.2f} ₽ ({orderbook.get('spread_percent', 0):.2f}%)")
-                print(f"  📈 Лучший bid: {orderbook.get('bids', [{}])[0].get('price', 0):.2f} ₽")
-                print(f"  📉 Лучший ask: {orderbook.get('asks', [{}])[0].get('price', 0):.2f} ₽")
+                bid_price = orderbook.get('bid_price', [])
+                ask_price = orderbook.get('ask_price', [])
+                print(f"  📈 Лучший bid: {bid_price[0] if len(bid_price) else 0:.2f} ₽")
+                print(f"  📉 Лучший ask: {ask_price[0] if len(ask_price) else 0:.2f} ₽")
                 print(f"  📊 Объем bid: {orderbook.get('total_bid_volume', 0)}")
                 print(f"  📊 Объем ask: {orderbook.get('total_ask_volume', 0)}")
                 print(f"  ⚖️ Дисбаланс: {orderbook.get('volume_imbalance', 0)}")
@@ -9,6 +9,18 @@ import yaml
 from pathlib import Path
 from typing import Dict, List, Any
 
+# Разбор через libyaml, если PyYAML собран с ним
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Справочники для проверок создаются один раз; проверка принадлежности - по множеству
+KNOWN_SYMBOLS = ('SBER', 'GAZP', 'LKOH', 'NVTK', 'ROSN', 'NLMK', 'MAGN', 'YNDX', 'MOEX', 'VTBR', 'ALRS', 'AFLT', 'SNGSP', 'MGNT', 'CHMF', 'RUAL', 'FIVE', 'OZON')
+_KNOWN_SYMBOLS_SET = frozenset(KNOWN_SYMBOLS)
+MODEL_TYPES = frozenset(('xgboost', 'deepseek', 'transformer'))
+REQUIRED_MODEL_PARAMS = ('name', 'type', 'weight', 'enabled')
+
 
 def validate_config(config_path: str) -> bool:
     """
@@ -25,7 +37,7 @@ def validate_config(config_path: str) -> bool:
         
         # Загрузка конфигурации
         with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
+            config = yaml.load(file, Loader=_YamlLoader)
         
         if not config:
             print("❌ Конфигурация пуста")
@@ -93,11 +105,10 @@ def validate_data_section(data_config: Dict[str, Any]) -> bool:
         print("❌ data.symbols должен быть непустым списком")
         return False
     
-    valid_symbols = ['SBER', 'GAZP', 'LKOH', 'NVTK', 'ROSN', 'NLMK', 'MAGN', 'YNDX', 'MOEX', 'VTBR', 'ALRS', 'AFLT', 'SNGSP', 'MGNT', 'CHMF', 'RUAL', 'FIVE', 'OZON']
-    invalid_symbols = [s for s in symbols if s not in valid_symbols]
+    invalid_symbols = [s for s in symbols if s not in _KNOWN_SYMBOLS_SET]
     if invalid_symbols:
         print(f"⚠️  Неизвестные символы: {invalid_symbols}")
-        print(f"Доступные символы: {valid_symbols}")
+        print(f"Доступные символы: {list(KNOWN_SYMBOLS)}")
     
     # Проверка интервалов
     update_interval = data_config['update_interval']
@@ -133,15 +144,14 @@ def validate_neural_networks_section(nn_config: Dict[str, Any]) -> bool:
         print(f"  📋 Проверка модели {i+1}: {model.get('name', 'unnamed')}")
         
         # Проверка обязательных параметров модели
-        required_model_params = ['name', 'type', 'weight', 'enabled']
-        for param in required_model_params:
+        for param in REQUIRED_MODEL_PARAMS:
             if param not in model:
                 print(f"❌ Модель {i+1}: отсутствует параметр {param}")
                 return False
         
         # Проверка типа модели
         model_type = model['type']
-        if model_type not in ['xgboost', 'deepseek', 'transformer']:
+        if model_type not in MODEL_TYPES:
             print(f"❌ Модель {i+1}: неизвестный тип {model_type}")
             return False
         
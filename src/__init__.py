@@ -5,3 +5,28 @@
 __version__ = "1.0.0"
 __author__ = "EFrolovDev"
 
+
+import os as _os
+
+
+def _select_protobuf_implementation():
+    """
+    Выбор C++ реализации protobuf для tinkoff-investments
+    
+    Должен выполниться до первого импорта protobuf. В protobuf 3.x по
+    умолчанию используется медленная Python-реализация; в 4.x и новее
+    по умолчанию работает upb, который не уступает C++ - его не трогаем.
+    Явно заданная переменная окружения не переопределяется.
+    """
+    if "PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION" in _os.environ:
+        return
+    try:
+        from importlib.metadata import version
+        major = int(version("protobuf").split(".")[0])
+    except Exception:
+        return
+    if major < 4:
+        _os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "cpp"
+
+
+_select_protobuf_implementation()
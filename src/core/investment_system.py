@@ -11,7 +11,7 @@ from pathlib import Path
 
 from ..data.data_provider import DataProvider
 from ..neural_networks.network_manager import NetworkManager
-from ..trading.trading_engine import TradingEngine
+from ..trading.trading_engine import TradingEngine, TBANK_BROKER_TYPES
 from ..portfolio.portfolio_manager import PortfolioManager
 from ..utils.config_manager import ConfigManager
 
@@ -92,6 +92,9 @@ class InvestmentSystem:
         # Ожидание завершения задач
         await asyncio.gather(*self.tasks, return_exceptions=True)
         
+        # Остановка потока рыночных данных
+        await self.data_provider.close()
+        
         logger.info("Торговая система остановлена")
     
     async def _initialize_components(self):
@@ -126,7 +129,7 @@ class InvestmentSystem:
             logger.info("✅ Торговый движок инициализирован")
             
             # Проверка успешной инициализации брокера для T-Bank
-            if self.trading_engine.broker_type in ['tinkoff', 'tbank']:
+            if self.trading_engine.broker_type in TBANK_BROKER_TYPES:
                 if not hasattr(self.trading_engine, 'tbank_broker') or not self.trading_engine.tbank_broker:
                     warning_msg = "T-Bank брокер не инициализирован, будет использован режим paper trading"
                     logger.warning(warning_msg)
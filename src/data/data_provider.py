@@ -7,7 +7,7 @@ import pandas as pd
 import numpy as np
 import os
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from loguru import logger
 
 try:
@@ -18,10 +18,14 @@ except ImportError:
     logger.warning("yfinance не установлен, YFinanceProvider недоступен")
 import asyncio
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 from .russian_data_provider import RussianDataProvider
 from .enhanced_tbank_provider import EnhancedTBankProvider, MultiProviderDataProvider
 from .news_data_provider import NewsDataProvider
 
+# Общая пустая запись для отсутствующих данных (без создания нового словаря на каждый промах)
+_EMPTY = MappingProxyType({})
+
 
 class MarketDataProvider(ABC):
     """
@@ -189,6 +193,7 @@ class YFinanceProvider(MarketDataProvider):
             Словарь с данными по тикерам
         """
         result = {}
+        timestamp = datetime.now().isoformat()
         
         for symbol in symbols:
             try:
@@ -202,7 +207,7 @@ class YFinanceProvider(MarketDataProvider):
                     'change': info.get('regularMarketChange', 0),
                     'change_percent': info.get('regularMarketChangePercent', 0),
                     'market_cap': info.get('marketCap', 0),
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
                 
             except Exception as e:
@@ -213,7 +218,7 @@ class YFinanceProvider(MarketDataProvider):
                     'change': 0,
                     'change_percent': 0,
                     'market_cap': 0,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
         
         return result
@@ -275,6 +280,8 @@ class DataProvider:
         self.symbols = config.get('symbols', [])
         self.update_interval = config.get('update_interval', 60)
         self.history_days = config.get('history_days', 365)
+        # Цены и стаканы из потока рыночных данных вместо опроса API (если провайдер поддерживает)
+        self.use_market_stream = config.get('use_market_stream', False)
         provider_type = config.get('provider', 'tbank').lower()
         
         # Инициализация провайдера в зависимости от типа
@@ -348,7 +355,11 @@ class DataProvider:
         # YFinance провайдер как резервный
         providers.append(YFinanceProvider(self.symbols))
         
-        return MultiProviderDataProvider(providers, primary_provider="EnhancedTBankProvider")
+        return MultiProviderDataProvider(
+            providers,
+            primary_provider="EnhancedTBankProvider",
+            hedged_fallback=self.config.get('hedged_fallback', False)
+        )
     
     async def initialize(self):
         """
@@ -360,6 +371,17 @@ class DataProvider:
         if hasattr(self.provider, 'initialize'):
             await self.provider.initialize()
         
+        # Подписка на поток рыночных данных: update_market_data берет данные из него,
+        # а при обрыве потока провайдер возвращается к опросу API
+        if self.use_market_stream:
+            if hasattr(self.provider, 'start_stream'):
+                await self.provider.start_stream(
+                    self.symbols,
+                    depth=self.config.get('tbank_orderbook_depth', 10)
+                )
+            else:
+                logger.info("Провайдер не поддерживает поток рыночных данных, используется опрос API")
+        
         # Загрузка исторических данных
         await self._load_historical_data()
         
@@ -465,7 +487,6 @@ class DataProvider:
             if not self.news_provider or not hasattr(self.news_provider, 'storage') or not self.news_provider.storage:
                 return
             
-            from datetime import date, timedelta
             cutoff_date = date.today() - timedelta(days=training_days)
             
             archived_count = self.news_provider.storage.archive_old_news(cutoff_date)
@@ -492,9 +513,14 @@ class DataProvider:
                     logger.warning(f"Ошибка получения расширенных данных: {e}")
             
             # Обновление последней записи в исторических данных
+            market_data = self.market_data
+            realtime_data = self.realtime_data
+            now = datetime.now()
             for symbol in self.symbols:
-                if symbol in self.market_data:
-                    current_price = self.realtime_data.get(symbol, {}).get('price', 0)
+                history = market_data.get(symbol)
+                if history is not None:
+                    quote = realtime_data.get(symbol) or _EMPTY
+                    current_price = quote.get('price', 0)
                     if current_price > 0:
                         # Добавление новой записи
                         new_row = pd.DataFrame({
@@ -502,14 +528,15 @@ class DataProvider:
                             'High': [current_price],
                             'Low': [current_price],
                             'Close': [current_price],
-                            'Volume': [self.realtime_data.get(symbol, {}).get('volume', 0)]
-                        }, index=[datetime.now()])
+                            'Volume': [quote.get('volume', 0)]
+                        }, index=[now])
                         
-                        self.market_data[symbol] = pd.concat([self.market_data[symbol], new_row])
+                        history = pd.concat([history, new_row])
                         
                         # Ограничение размера данных
-                        if len(self.market_data[symbol]) > 1000:
-                            self.market_data[symbol] = self.market_data[symbol].tail(1000)
+                        if len(history) > 1000:
+                            history = history.tail(1000)
+                        market_data[symbol] = history
             
             # Обновление новостных данных (если включено)
             if self.news_provider:
@@ -680,6 +707,13 @@ class DataProvider:
             logger.error(f"Ошибка расчета технических индикаторов для {symbol}: {e}")
             return {}
     
+    async def close(self):
+        """
+        Остановка потока рыночных данных, если он был запущен
+        """
+        if hasattr(self.provider, 'stop_stream'):
+            await self.provider.stop_stream()
+    
     def get_status(self) -> Dict:
         """
         Получение статуса провайдера данных
@@ -694,7 +728,8 @@ class DataProvider:
             'realtime_data_count': len(self.realtime_data),
             'enhanced_data_count': len(self.enhanced_data),
             'supports_orderbook': hasattr(self.provider, 'get_orderbook'),
-            'supports_enhanced_data': hasattr(self.provider, 'get_enhanced_market_data')
+            'supports_enhanced_data': hasattr(self.provider, 'get_enhanced_market_data'),
+            'streaming': getattr(self.provider, 'is_streaming', False)
         }
     
     async def get_orderbook_data(self, symbol: str) -> Dict:
@@ -3,17 +3,22 @@
 Включает стакан заявок, расширенные рыночные данные и множественные источники
 """
 
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, AsyncIterator, Awaitable, Callable
 import pandas as pd
 import numpy as np
 import asyncio
-from datetime import datetime, timedelta
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
 from loguru import logger
 import os
 from abc import ABC, abstractmethod
 
 try:
-    from tinkoff.invest import Client, AsyncClient, CandleInterval, HistoricCandle
+    from tinkoff.invest import (
+        Client, AsyncClient, CandleInterval, HistoricCandle,
+        LastPriceInstrument, OrderBookInstrument
+    )
     from tinkoff.invest.schemas import Share, GetLastPricesResponse, OrderBook
     from tinkoff.invest.constants import INVEST_GRPC_API, INVEST_GRPC_API_SANDBOX
     TINKOFF_AVAILABLE = True
@@ -21,6 +26,77 @@ except ImportError:
     TINKOFF_AVAILABLE = False
     logger.warning("T-Bank API недоступен. Установите: pip install tinkoff-investments")
 
+# Период данных -> количество дней
+PERIOD_DAYS = {
+    '1d': 1, '1w': 7, '1m': 30, '3m': 90,
+    '6m': 180, '1y': 365, '2y': 730, '5y': 1825
+}
+
+# Интервалы для свечей
+if TINKOFF_AVAILABLE:
+    CANDLE_INTERVALS = {
+        '1m': CandleInterval.CANDLE_INTERVAL_1_MIN,
+        '5m': CandleInterval.CANDLE_INTERVAL_5_MIN,
+        '15m': CandleInterval.CANDLE_INTERVAL_15_MIN,
+        '1h': CandleInterval.CANDLE_INTERVAL_HOUR,
+        '1d': CandleInterval.CANDLE_INTERVAL_DAY
+    }
+else:
+    CANDLE_INTERVALS = {}
+
+# Время жизни кэша исторических данных (секунды) в зависимости от интервала свечей
+HISTORICAL_CACHE_TTL = {
+    '1m': 60,
+    '5m': 60,
+    '15m': 60,
+    '1h': 3600,
+    '1d': 86400
+}
+HISTORICAL_CACHE_MAX_SIZE = 256
+
+# Ограничение одновременных запросов стакана (лимит потоков gRPC на соединение)
+ORDERBOOK_MAX_CONCURRENCY = 32
+
+# Окно объединения параллельных запросов цен (секунды)
+PRICE_BATCH_WINDOW = 0.001
+
+# Пауза перед переподключением потока рыночных данных (секунды)
+STREAM_RECONNECT_DELAY = 5.0
+
+# Поток без сообщений дольше этого времени (секунды) считается неработающим:
+# цены и стаканы снова запрашиваются у API
+STREAM_MAX_SILENCE = 60.0
+
+
+class OrderBookSnapshot(dict):
+    """
+    Стакан заявок
+    
+    Уровни хранятся колонками NumPy: bid_price, bid_qty, ask_price, ask_qty.
+    Прежний формат списков словарей {price, quantity} доступен через
+    свойства bids_dictlist / asks_dictlist.
+    """
+    
+    __slots__ = ()
+    
+    @property
+    def bids_dictlist(self) -> List[Dict]:
+        """Заявки на покупку в виде списка словарей {price, quantity}"""
+        return _levels_to_dictlist(self['bid_price'], self['bid_qty'])
+    
+    @property
+    def asks_dictlist(self) -> List[Dict]:
+        """Заявки на продажу в виде списка словарей {price, quantity}"""
+        return _levels_to_dictlist(self['ask_price'], self['ask_qty'])
+
+
+def _levels_to_dictlist(prices: np.ndarray, quantities: np.ndarray) -> List[Dict]:
+    """Преобразование колонок уровней стакана в список словарей"""
+    return [
+        {'price': price, 'quantity': quantity}
+        for price, quantity in zip(prices.tolist(), quantities.tolist())
+    ]
+
 
 class BaseDataProvider(ABC):
     """Базовый класс для провайдеров данных"""
@@ -53,6 +129,8 @@ class EnhancedTBankProvider(BaseDataProvider):
     - Расширенные рыночные данные
     """
     
+    candle_intervals = CANDLE_INTERVALS
+    
     def __init__(self, token: str, sandbox: bool = True, symbols: List[str] = None):
         """
         Инициализация провайдера
@@ -77,17 +155,22 @@ class EnhancedTBankProvider(BaseDataProvider):
         self.instruments_cache: Dict[str, Dict] = {}  # ticker -> {figi, name, currency}
         self.orderbook_cache: Dict[str, Dict] = {}   # ticker -> orderbook data
         self.last_prices_cache: Dict[str, float] = {} # ticker -> last price
+        self._ticker_to_figi_map: Dict[str, str] = {}  # ticker -> figi (быстрый поиск)
+        # (ticker, period, interval) -> (expires_at, DataFrame), порядок - LRU
+        self._hist_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, pd.DataFrame]]" = OrderedDict()
+        # (ticker, interval) -> (начало покрытого периода, DataFrame) для инкрементальной догрузки,
+        # порядок - LRU
+        self._hist_store: "OrderedDict[Tuple[str, str], Tuple[datetime, pd.DataFrame]]" = OrderedDict()
+        # Поток рыночных данных: ticker -> {price, timestamp, figi}
+        self._stream_prices: Dict[str, Dict] = {}
+        # Стаканы из потока: ticker -> стакан глубины _stream_depth. Хранятся отдельно
+        # от orderbook_cache, который заполняют и запросы к API
+        self._stream_orderbooks: Dict[str, OrderBookSnapshot] = {}
+        self._stream_depth = 0
+        self._stream_task: Optional[asyncio.Task] = None
+        self._stream_last_message = 0.0  # time.monotonic() последнего сообщения потока
         self._initialized = False
         
-        # Интервалы для свечей
-        self.candle_intervals = {
-            '1m': CandleInterval.CANDLE_INTERVAL_1_MIN,
-            '5m': CandleInterval.CANDLE_INTERVAL_5_MIN,
-            '15m': CandleInterval.CANDLE_INTERVAL_15_MIN,
-            '1h': CandleInterval.CANDLE_INTERVAL_HOUR,
-            '1d': CandleInterval.CANDLE_INTERVAL_DAY
-        }
-        
         logger.info(f"Инициализирован расширенный T-Bank провайдер (sandbox={sandbox})")
         
         # Инициализация будет выполнена при первом вызове
@@ -112,110 +195,83 @@ class EnhancedTBankProvider(BaseDataProvider):
     async def _load_instruments(self, client):
         """Загрузка списка доступных инструментов"""
         try:
-            # Получение акций
-            shares_response = await client.instruments.shares()
-            for share in shares_response.instruments:
-                if share.api_trade_available_flag:
-                    self.instruments_cache[share.ticker] = {
-                        'figi': share.figi,
-                        'name': share.name,
-                        'currency': share.currency,
-                        'trading_status': share.trading_status.name,
-                        'type': 'share'
-                    }
-            
-            # Получение облигаций
-            bonds_response = await client.instruments.bonds()
-            for bond in bonds_response.instruments:
-                if bond.api_trade_available_flag:
-                    self.instruments_cache[bond.ticker] = {
-                        'figi': bond.figi,
-                        'name': bond.name,
-                        'currency': bond.currency,
-                        'trading_status': bond.trading_status.name,
-                        'type': 'bond'
-                    }
-            
-            # Получение ETF
-            etfs_response = await client.instruments.etfs()
-            for etf in etfs_response.instruments:
-                if etf.api_trade_available_flag:
-                    self.instruments_cache[etf.ticker] = {
-                        'figi': etf.figi,
-                        'name': etf.name,
-                        'currency': etf.currency,
-                        'trading_status': etf.trading_status.name,
-                        'type': 'etf'
-                    }
+            # Акции, облигации и ETF запрашиваются параллельно - запросы независимы
+            shares_response, bonds_response, etfs_response = await asyncio.gather(
+                client.instruments.shares(),
+                client.instruments.bonds(),
+                client.instruments.etfs()
+            )
+            
+            self._index_instruments(shares_response.instruments, 'share')
+            self._index_instruments(bonds_response.instruments, 'bond')
+            self._index_instruments(etfs_response.instruments, 'etf')
                     
         except Exception as e:
             logger.error(f"Ошибка загрузки инструментов: {e}")
             raise
     
-    async def _ticker_to_figi(self, ticker: str) -> Optional[str]:
+    def _index_instruments(self, instruments, type_name: str):
+        """
+        Добавление доступных для торговли инструментов в кэш
+        
+        Args:
+            instruments: Список инструментов из ответа API
+            type_name: Тип инструмента (share, bond, etf)
+        """
+        for instrument in instruments:
+            if instrument.api_trade_available_flag:
+                self._cache_instrument(instrument.ticker, instrument, type_name)
+    
+    def _cache_instrument(self, ticker: str, instrument, type_name: str):
+        """Сохранение инструмента в кэш и в индекс тикер -> FIGI"""
+        self.instruments_cache[ticker] = {
+            'figi': instrument.figi,
+            'name': instrument.name,
+            'currency': instrument.currency,
+            'trading_status': instrument.trading_status.name,
+            'type': type_name
+        }
+        self._ticker_to_figi_map[ticker] = instrument.figi
+    
+    async def _ticker_to_figi(self, ticker: str, quiet: bool = False) -> Optional[str]:
         """
         Получение FIGI по тикеру (динамически, не зависит от конфигурации)
         
         Args:
             ticker: Тикер инструмента
+            quiet: Не выводить предупреждение, если FIGI не найден
+                (вызывающий код сообщает об этом сам)
             
         Returns:
             FIGI инструмента или None
         """
         # Сначала проверяем кэш
-        if ticker in self.instruments_cache:
-            return self.instruments_cache[ticker].get('figi')
+        figi = self._ticker_to_figi_map.get(ticker)
+        if figi:
+            return figi
         
         # Если не в кэше - ищем динамически через API
+        ticker_upper = ticker.upper()
         try:
             async with AsyncClient(self.token, target=self.target) as client:
                 # Попытка найти инструмент по тикеру через поиск
                 try:
-                    # Используем метод поиска инструментов по тикеру
-                    # T-Bank API имеет метод find_instrument, но если его нет, используем shares/bonds
-                    shares_response = await client.instruments.shares()
-                    for share in shares_response.instruments:
-                        if share.ticker.upper() == ticker.upper() and share.api_trade_available_flag:
-                            # Сохраняем в кэш для будущего использования
-                            self.instruments_cache[ticker] = {
-                                'figi': share.figi,
-                                'name': share.name,
-                                'currency': share.currency,
-                                'trading_status': share.trading_status.name,
-                                'type': 'share'
-                            }
-                            logger.debug(f"Найден FIGI для {ticker} через динамический поиск: {share.figi}")
-                            return share.figi
-                    
-                    # Если не найден в акциях, проверяем облигации
-                    bonds_response = await client.instruments.bonds()
-                    for bond in bonds_response.instruments:
-                        if bond.ticker.upper() == ticker.upper() and bond.api_trade_available_flag:
-                            self.instruments_cache[ticker] = {
-                                'figi': bond.figi,
-                                'name': bond.name,
-                                'currency': bond.currency,
-                                'trading_status': bond.trading_status.name,
-                                'type': 'bond'
-                            }
-                            logger.debug(f"Найден FIGI для {ticker} (облигация) через динамический поиск: {bond.figi}")
-                            return bond.figi
+                    # Используем shares/bonds/etfs по очереди, чтобы не запрашивать лишнее
+                    for method, type_name in (
+                        (client.instruments.shares, 'share'),
+                        (client.instruments.bonds, 'bond'),
+                        (client.instruments.etfs, 'etf')
+                    ):
+                        response = await method()
+                        for instrument in response.instruments:
+                            if instrument.ticker.upper() == ticker_upper and instrument.api_trade_available_flag:
+                                # Сохраняем в кэш для будущего использования
+                                self._cache_instrument(ticker, instrument, type_name)
+                                logger.debug(f"Найден FIGI для {ticker} ({type_name}) через динамический поиск: {instrument.figi}")
+                                return instrument.figi
                     
-                    # Если не найден в облигациях, проверяем ETF
-                    etfs_response = await client.instruments.etfs()
-                    for etf in etfs_response.instruments:
-                        if etf.ticker.upper() == ticker.upper() and etf.api_trade_available_flag:
-                            self.instruments_cache[ticker] = {
-                                'figi': etf.figi,
-                                'name': etf.name,
-                                'currency': etf.currency,
-                                'trading_status': etf.trading_status.name,
-                                'type': 'etf'
-                            }
-                            logger.debug(f"Найден FIGI для {ticker} (ETF) через динамический поиск: {etf.figi}")
-                            return etf.figi
-                    
-                    logger.warning(f"FIGI не найден для тикера {ticker} через динамический поиск")
+                    if not quiet:
+                        logger.warning(f"FIGI не найден для тикера {ticker} через динамический поиск")
                     return None
                     
                 except Exception as e:
@@ -230,9 +286,23 @@ class EnhancedTBankProvider(BaseDataProvider):
         Синхронная версия получения FIGI (только из кэша)
         Используется для совместимости со старым кодом
         """
-        if ticker in self.instruments_cache:
-            return self.instruments_cache[ticker].get('figi')
-        return None
+        return self._ticker_to_figi_map.get(ticker)
+    
+    @staticmethod
+    def to_iso(timestamp) -> str:
+        """
+        Приведение отметки времени к строке ISO 8601 - единому формату
+        поля timestamp во всех провайдерах данных
+        
+        Args:
+            timestamp: datetime или уже отформатированная строка
+            
+        Returns:
+            Строка в формате ISO 8601
+        """
+        if isinstance(timestamp, datetime):
+            return timestamp.isoformat()
+        return str(timestamp) if timestamp is not None else ''
     
     def _quotation_to_float(self, quotation) -> float:
         """Конвертация Quotation в float"""
@@ -257,6 +327,12 @@ class EnhancedTBankProvider(BaseDataProvider):
         Returns:
             DataFrame с историческими данными
         """
+        cache_key = (symbol, period, interval)
+        cached = self._get_cached_historical(cache_key)
+        if cached is not None:
+            logger.debug(f"Исторические данные для {symbol} взяты из кэша")
+            return cached
+        
         try:
             figi = await self._ticker_to_figi(symbol)
             if not figi:
@@ -264,56 +340,108 @@ class EnhancedTBankProvider(BaseDataProvider):
                 return pd.DataFrame()
             
             # Определение периода
-            period_map = {
-                '1d': 1, '1w': 7, '1m': 30, '3m': 90, 
-                '6m': 180, '1y': 365, '2y': 730, '5y': 1825
-            }
-            days = period_map.get(period, 365)
+            days = PERIOD_DAYS.get(period, 365)
             
             # Определение интервала
             candle_interval = self.candle_intervals.get(interval, CandleInterval.CANDLE_INTERVAL_DAY)
             
             # Расчет дат
-            to_date = datetime.now()
+            to_date = datetime.now(timezone.utc)
             from_date = to_date - timedelta(days=days)
             
+            # Если история уже загружена за нужный период - догружаем только новые свечи
+            store_key = (symbol, interval)
+            stored = self._hist_store.get(store_key)
+            incremental = stored is not None and stored[0] <= from_date and not stored[1].empty
+            fetch_from = stored[1].index[-1].to_pydatetime() if incremental else from_date
+            
             async with AsyncClient(self.token, target=self.target) as client:
                 candles = []
                 async for candle in client.get_all_candles(
                     figi=figi,
-                    from_=from_date,
+                    from_=fetch_from,
                     to=to_date,
                     interval=candle_interval,
                 ):
                     candles.append(candle)
-                
-                if not candles:
-                    logger.warning(f"Нет данных для {symbol}")
-                    return pd.DataFrame()
-                
-                # Конвертация в DataFrame
-                data = []
-                for candle in candles:
-                    data.append({
-                        'Open': self._quotation_to_float(candle.open),
-                        'High': self._quotation_to_float(candle.high),
-                        'Low': self._quotation_to_float(candle.low),
-                        'Close': self._quotation_to_float(candle.close),
-                        'Volume': candle.volume,
-                        'Time': candle.time
-                    })
-                
-                df = pd.DataFrame(data)
-                df.set_index('Time', inplace=True)
+            
+            if not candles and not incremental:
+                logger.warning(f"Нет данных для {symbol}")
+                return pd.DataFrame()
+            
+            # Конвертация в DataFrame: колонки и индекс задаются сразу при создании
+            q2f = self._quotation_to_float
+            df = pd.DataFrame(
+                {
+                    'Open': [q2f(candle.open) for candle in candles],
+                    'High': [q2f(candle.high) for candle in candles],
+                    'Low': [q2f(candle.low) for candle in candles],
+                    'Close': [q2f(candle.close) for candle in candles],
+                    'Volume': [candle.volume for candle in candles]
+                },
+                index=pd.DatetimeIndex([candle.time for candle in candles], name='Time')
+            )
+            if not df.empty:
                 df.sort_index(inplace=True)
-                
-                logger.debug(f"Получены исторические данные для {symbol}: {len(df)} записей")
-                return df
+            
+            if incremental:
+                # Последняя сохраненная свеча могла быть незавершенной - берем свежую версию
+                history = stored[1]
+                if not df.empty:
+                    history = pd.concat([history, df])
+                    history = history[~history.index.duplicated(keep='last')]
+                # Хранится самая широкая загруженная история, обрезается только ответ
+                self._store_history(store_key, stored[0], history)
+                df = history[history.index >= from_date]
+            else:
+                self._store_history(store_key, from_date, df)
+            self._store_cached_historical(cache_key, interval, df)
+            
+            logger.debug(
+                f"Получены исторические данные для {symbol}: {len(df)} записей "
+                f"({len(candles)} загружено{' инкрементально' if incremental else ''})"
+            )
+            # Наружу отдается копия, как и при попадании в кэш
+            return df.copy(deep=False)
                 
         except Exception as e:
             logger.error(f"Ошибка получения исторических данных для {symbol}: {e}")
             return pd.DataFrame()
     
+    def _get_cached_historical(self, key: Tuple[str, str, str]) -> Optional[pd.DataFrame]:
+        """Получение исторических данных из кэша, если срок жизни записи не истек"""
+        entry = self._hist_cache.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, df = entry
+        if expires_at <= time.monotonic():
+            del self._hist_cache[key]
+            return None
+        
+        self._hist_cache.move_to_end(key)
+        return df.copy(deep=False)
+    
+    def _store_history(self, key: Tuple[str, str], covered_from: datetime, df: pd.DataFrame):
+        """Сохранение истории для инкрементальной догрузки с вытеснением давно использованных"""
+        self._hist_store[key] = (covered_from, df)
+        self._hist_store.move_to_end(key)
+        while len(self._hist_store) > HISTORICAL_CACHE_MAX_SIZE:
+            self._hist_store.popitem(last=False)
+    
+    def _store_cached_historical(self, key: Tuple[str, str, str], interval: str, df: pd.DataFrame):
+        """Сохранение исторических данных в кэш с вытеснением устаревших записей"""
+        now = time.monotonic()
+        self._hist_cache[key] = (now + HISTORICAL_CACHE_TTL.get(interval, HISTORICAL_CACHE_TTL['1d']), df)
+        self._hist_cache.move_to_end(key)
+        
+        if len(self._hist_cache) > HISTORICAL_CACHE_MAX_SIZE:
+            # Сначала удаляем просроченные записи, затем самые давно использованные
+            for expired_key in [k for k, (expires_at, _) in self._hist_cache.items() if expires_at <= now]:
+                del self._hist_cache[expired_key]
+            while len(self._hist_cache) > HISTORICAL_CACHE_MAX_SIZE:
+                self._hist_cache.popitem(last=False)
+    
     async def get_realtime_data(self, symbols: List[str]) -> Dict[str, Dict]:
         """
         Получение данных в реальном времени
@@ -326,36 +454,45 @@ class EnhancedTBankProvider(BaseDataProvider):
         """
         result = {}
         
+        if self.is_streaming:
+            # Данные из потока - основной источник, API только для недостающих тикеров
+            result = {symbol: self._stream_prices[symbol] for symbol in symbols if symbol in self._stream_prices}
+            symbols = [symbol for symbol in symbols if symbol not in result]
+            if not symbols:
+                return result
+        
         try:
-            # Получение FIGI для всех символов
-            figi_list = []
-            symbol_to_figi = {}
+            # Получение FIGI для всех символов: известные - из индекса, остальные - через поиск
+            figi_of = self._ticker_to_figi_map.get
+            figi_to_symbol = {figi: symbol for symbol in symbols if (figi := figi_of(symbol))}
             
             for symbol in symbols:
-                figi = await self._ticker_to_figi(symbol)
-                if figi:
-                    figi_list.append(figi)
-                    symbol_to_figi[figi] = symbol
+                if symbol not in self._ticker_to_figi_map:
+                    figi = await self._ticker_to_figi(symbol, quiet=True)
+                    if figi:
+                        figi_to_symbol[figi] = symbol
             
-            if not figi_list:
+            if not figi_to_symbol:
                 logger.warning("Нет доступных FIGI для получения данных")
                 return result
             
+            q2f = self._quotation_to_float
             async with AsyncClient(self.token, target=self.target) as client:
                 # Получение последних цен
-                last_prices_response = await client.market_data.get_last_prices(figi=figi_list)
+                last_prices_response = await client.market_data.get_last_prices(figi=list(figi_to_symbol))
                 
                 for price_data in last_prices_response.last_prices:
-                    symbol = symbol_to_figi.get(price_data.figi)
+                    symbol = figi_to_symbol.get(price_data.figi)
                     if symbol:
+                        price = q2f(price_data.price)
                         result[symbol] = {
-                            'price': self._quotation_to_float(price_data.price),
-                            'timestamp': price_data.time.isoformat(),
+                            'price': price,
+                            'timestamp': self.to_iso(price_data.time),
                             'figi': price_data.figi
                         }
                         
                         # Обновление кэша
-                        self.last_prices_cache[symbol] = self._quotation_to_float(price_data.price)
+                        self.last_prices_cache[symbol] = price
                 
                 logger.debug(f"Получены данные в реальном времени для {len(result)} инструментов")
                 
@@ -364,74 +501,145 @@ class EnhancedTBankProvider(BaseDataProvider):
         
         return result
     
-    async def get_orderbook(self, symbol: str, depth: int = 10) -> Dict:
+    async def get_orderbook(self, symbol: str, depth: int = 10, timestamp: Optional[str] = None) -> Dict:
         """
         Получение стакана заявок
         
         Args:
             symbol: Тикер инструмента
             depth: Глубина стакана
+            timestamp: Отметка времени пакета (если не задана - текущее время)
             
         Returns:
             Словарь со стаканом заявок
         """
+        orderbook = self._get_stream_orderbook(symbol, depth)
+        if orderbook is not None:
+            return orderbook
+        
         try:
-            figi = await self._ticker_to_figi(symbol)
+            async with AsyncClient(self.token, target=self.target) as client:
+                return await self._get_orderbook_with_client(client, symbol, depth, timestamp)
+        except Exception as e:
+            logger.error(f"Ошибка подключения к API для получения стакана {symbol}: {e}")
+            return {}
+    
+    async def _get_orderbook_with_client(
+        self,
+        client,
+        symbol: str,
+        depth: int = 10,
+        timestamp: Optional[str] = None
+    ) -> Dict:
+        """
+        Получение стакана заявок через уже открытый клиент
+        
+        Args:
+            client: Открытый AsyncClient
+            symbol: Тикер инструмента
+            depth: Глубина стакана
+            timestamp: Отметка времени пакета (если не задана - текущее время)
+            
+        Returns:
+            Словарь со стаканом заявок
+        """
+        try:
+            figi = await self._ticker_to_figi(symbol, quiet=True)
             if not figi:
                 logger.warning(f"FIGI не найден для тикера {symbol}")
                 return {}
             
-            async with AsyncClient(self.token, target=self.target) as client:
-                response = await client.market_data.get_order_book(
-                    figi=figi,
-                    depth=depth
-                )
-                
-                orderbook = {
-                    'symbol': symbol,
-                    'figi': figi,
-                    'depth': depth,
-                    'timestamp': datetime.now().isoformat(),  # Используем текущее время
-                    'bids': [
-                        {
-                            'price': self._quotation_to_float(bid.price),
-                            'quantity': bid.quantity
-                        }
-                        for bid in response.bids
-                    ],
-                    'asks': [
-                        {
-                            'price': self._quotation_to_float(ask.price),
-                            'quantity': ask.quantity
-                        }
-                        for ask in response.asks
-                    ],
-                    'last_price': self._quotation_to_float(response.last_price) if response.last_price else 0.0,
-                }
-                
-                # Расчет дополнительных метрик
-                if orderbook['bids'] and orderbook['asks']:
-                    best_bid = orderbook['bids'][0]['price']
-                    best_ask = orderbook['asks'][0]['price']
-                    orderbook['spread'] = best_ask - best_bid
-                    orderbook['spread_percent'] = (orderbook['spread'] / best_ask) * 100
-                    orderbook['mid_price'] = (best_bid + best_ask) / 2
-                    
-                    # Объемы в стакане
-                    orderbook['total_bid_volume'] = sum(bid['quantity'] for bid in orderbook['bids'])
-                    orderbook['total_ask_volume'] = sum(ask['quantity'] for ask in orderbook['asks'])
-                    orderbook['volume_imbalance'] = orderbook['total_bid_volume'] - orderbook['total_ask_volume']
-                
-                # Обновление кэша
-                self.orderbook_cache[symbol] = orderbook
-                
-                logger.debug(f"Получен стакан заявок для {symbol}: {len(orderbook['bids'])} bids, {len(orderbook['asks'])} asks")
-                return orderbook
-                
+            response = await client.market_data.get_order_book(
+                figi=figi,
+                depth=depth
+            )
+            
+            orderbook = self._build_orderbook(
+                symbol,
+                figi,
+                depth,
+                response.bids,
+                response.asks,
+                self._quotation_to_float(response.last_price),
+                timestamp or datetime.now().isoformat()  # Используем текущее время
+            )
+            
+            # Обновление кэша
+            self.orderbook_cache[symbol] = orderbook
+            
+            logger.debug(f"Получен стакан заявок для {symbol}: {orderbook['bid_price'].size} bids, {orderbook['ask_price'].size} asks")
+            return orderbook
+            
         except Exception as e:
             logger.error(f"Ошибка получения стакана для {symbol}: {e}")
             return {}
     
+    def _build_orderbook(
+        self,
+        symbol: str,
+        figi: str,
+        depth: int,
+        bids,
+        asks,
+        last_price: float,
+        timestamp
+    ) -> OrderBookSnapshot:
+        """
+        Построение стакана заявок из уровней ответа API
+        
+        Args:
+            symbol: Тикер инструмента
+            figi: FIGI инструмента
+            depth: Глубина стакана
+            bids: Уровни заявок на покупку
+            asks: Уровни заявок на продажу
+            last_price: Последняя цена
+            timestamp: Отметка времени стакана
+            
+        Returns:
+            Стакан заявок с рассчитанными метриками
+        """
+        # Уровни стакана собираются в колонки NumPy
+        q2f = self._quotation_to_float
+        bid_price = np.empty(len(bids), dtype=np.float64)
+        bid_qty = np.empty(len(bids), dtype=np.int64)
+        for i, bid in enumerate(bids):
+            bid_price[i] = q2f(bid.price)
+            bid_qty[i] = bid.quantity
+        
+        ask_price = np.empty(len(asks), dtype=np.float64)
+        ask_qty = np.empty(len(asks), dtype=np.int64)
+        for i, ask in enumerate(asks):
+            ask_price[i] = q2f(ask.price)
+            ask_qty[i] = ask.quantity
+        
+        orderbook = OrderBookSnapshot(
+            symbol=symbol,
+            figi=figi,
+            depth=depth,
+            timestamp=timestamp,
+            bid_price=bid_price,
+            bid_qty=bid_qty,
+            ask_price=ask_price,
+            ask_qty=ask_qty,
+            last_price=last_price
+        )
+        
+        # Расчет дополнительных метрик
+        if bid_price.size and ask_price.size:
+            best_bid = float(bid_price[0])
+            best_ask = float(ask_price[0])
+            orderbook['spread'] = best_ask - best_bid
+            orderbook['spread_percent'] = (orderbook['spread'] / best_ask) * 100
+            orderbook['mid_price'] = (best_bid + best_ask) / 2
+            
+            # Объемы в стакане
+            orderbook['total_bid_volume'] = int(bid_qty.sum())
+            orderbook['total_ask_volume'] = int(ask_qty.sum())
+            orderbook['volume_imbalance'] = orderbook['total_bid_volume'] - orderbook['total_ask_volume']
+        
+        return orderbook
+    
     async def get_enhanced_market_data(self, symbols: List[str]) -> Dict[str, Dict]:
         """
         Получение расширенных рыночных данных
@@ -451,48 +659,9 @@ class EnhancedTBankProvider(BaseDataProvider):
         result = {}
         
         try:
-            # Получение базовых данных
-            realtime_data = await self.get_realtime_data(symbols)
+            async for symbol, data in self.iter_enhanced_market_data(symbols):
+                result[symbol] = data
             
-            for symbol in symbols:
-                if symbol not in realtime_data:
-                    continue
-                
-                # Получение стакана заявок
-                orderbook = await self.get_orderbook(symbol, depth=10)
-                
-                # Информация об инструменте
-                instrument_info = self.instruments_cache.get(symbol, {})
-                
-                # Объединение всех данных
-                result[symbol] = {
-                    # Базовые данные
-                    'price': realtime_data[symbol]['price'],
-                    'timestamp': realtime_data[symbol]['timestamp'],
-                    'figi': realtime_data[symbol]['figi'],
-                    
-                    # Стакан заявок
-                    'orderbook': orderbook,
-                    
-                    # Информация об инструменте
-                    'instrument': {
-                        'name': instrument_info.get('name', ''),
-                        'currency': instrument_info.get('currency', ''),
-                        'type': instrument_info.get('type', ''),
-                        'trading_status': instrument_info.get('trading_status', '')
-                    },
-                    
-                    # Дополнительные метрики
-                    'metrics': {
-                        'spread': orderbook.get('spread', 0),
-                        'spread_percent': orderbook.get('spread_percent', 0),
-                        'mid_price': orderbook.get('mid_price', 0),
-                        'volume_imbalance': orderbook.get('volume_imbalance', 0),
-                        'total_bid_volume': orderbook.get('total_bid_volume', 0),
-                        'total_ask_volume': orderbook.get('total_ask_volume', 0)
-                    }
-                }
-                
             logger.debug(f"Получены расширенные данные для {len(result)} инструментов")
             
         except Exception as e:
@@ -500,6 +669,85 @@ class EnhancedTBankProvider(BaseDataProvider):
         
         return result
     
+    async def iter_enhanced_market_data(
+        self,
+        symbols: List[str],
+        max_concurrency: int = ORDERBOOK_MAX_CONCURRENCY
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Потоковое получение расширенных рыночных данных
+        
+        Стаканы запрашиваются параллельно через один клиент с ограничением
+        числа одновременных запросов, результаты отдаются по мере готовности.
+        
+        Args:
+            symbols: Список тикеров
+            max_concurrency: Максимум одновременных запросов стакана
+            
+        Yields:
+            Пары (тикер, расширенные данные)
+        """
+        # Получение базовых данных
+        realtime_data = await self.get_realtime_data(symbols)
+        available = [symbol for symbol in symbols if symbol in realtime_data]
+        if not available:
+            return
+        
+        # Одна отметка времени на весь пакет стаканов
+        batch_timestamp = datetime.now().isoformat()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async with AsyncClient(self.token, target=self.target) as client:
+            async def fetch(symbol: str) -> Tuple[str, Dict]:
+                orderbook = self._get_stream_orderbook(symbol, 10)
+                if orderbook is not None:
+                    return symbol, orderbook
+                async with semaphore:
+                    return symbol, await self._get_orderbook_with_client(client, symbol, 10, batch_timestamp)
+            
+            tasks = [asyncio.create_task(fetch(symbol)) for symbol in available]
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    symbol, orderbook = await next_done
+                    yield symbol, self._combine_enhanced_data(symbol, realtime_data[symbol], orderbook)
+            finally:
+                # Если потребитель прервал итерацию - отменяем оставшиеся запросы
+                for task in tasks:
+                    task.cancel()
+    
+    def _combine_enhanced_data(self, symbol: str, realtime: Dict, orderbook: Dict) -> Dict:
+        """Объединение цены, стакана и информации об инструменте"""
+        # Информация об инструменте
+        instrument_info = self.instruments_cache.get(symbol, {})
+        
+        return {
+            # Базовые данные
+            'price': realtime['price'],
+            'timestamp': realtime['timestamp'],
+            'figi': realtime['figi'],
+            
+            # Стакан заявок
+            'orderbook': orderbook,
+            
+            # Информация об инструменте
+            'instrument': {
+                'name': instrument_info.get('name', ''),
+                'currency': instrument_info.get('currency', ''),
+                'type': instrument_info.get('type', ''),
+                'trading_status': instrument_info.get('trading_status', '')
+            },
+            
+            # Дополнительные метрики
+            'metrics': {
+                'spread': orderbook.get('spread', 0),
+                'spread_percent': orderbook.get('spread_percent', 0),
+                'mid_price': orderbook.get('mid_price', 0),
+                'volume_imbalance': orderbook.get('volume_imbalance', 0),
+                'total_bid_volume': orderbook.get('total_bid_volume', 0),
+                'total_ask_volume': orderbook.get('total_ask_volume', 0)
+            }
+        }
+    
     async def get_available_instruments(self) -> Dict[str, Dict]:
         """Получение списка доступных инструментов"""
         return self.instruments_cache.copy()
@@ -515,6 +763,198 @@ class EnhancedTBankProvider(BaseDataProvider):
     def get_cached_price(self, symbol: str) -> Optional[float]:
         """Получение кэшированной цены"""
         return self.last_prices_cache.get(symbol)
+    
+    def _get_stream_orderbook(self, symbol: str, depth: int) -> Optional[OrderBookSnapshot]:
+        """
+        Стакан из потока, если он покрывает запрос
+        
+        Стакан отдается только для подписанного тикера, пока поток активен,
+        и только если запрошенная глубина не больше глубины подписки.
+        Отметка времени - время биржи из сообщения потока.
+        """
+        if depth > self._stream_depth or not self.is_streaming:
+            return None
+        return self._stream_orderbooks.get(symbol)
+    
+    @property
+    def is_streaming(self) -> bool:
+        """Активна ли подписка на поток рыночных данных и поступают ли из нее сообщения"""
+        return (
+            self._stream_task is not None
+            and not self._stream_task.done()
+            and time.monotonic() - self._stream_last_message < STREAM_MAX_SILENCE
+        )
+    
+    async def start_stream(self, symbols: Optional[List[str]] = None, depth: int = 10):
+        """
+        Запуск подписки на поток рыночных данных (последние цены и стаканы)
+        
+        Пока поток активен, get_realtime_data и get_orderbook отдают данные
+        из кэша, обновляемого потоком, и обращаются к API только для
+        отсутствующих в нем тикеров. Если сообщений нет дольше
+        STREAM_MAX_SILENCE (обрыв, переподключение), данные снова берутся опросом API.
+        
+        Args:
+            symbols: Список тикеров (по умолчанию - отслеживаемые символы)
+            depth: Глубина стакана
+        """
+        if self._stream_task is not None and not self._stream_task.done():
+            return
+        
+        symbols = symbols or self.symbols
+        figi_to_symbol = {}
+        for symbol in symbols:
+            figi = await self._ticker_to_figi(symbol)
+            if figi:
+                figi_to_symbol[figi] = symbol
+        
+        if not figi_to_symbol:
+            logger.warning("Нет доступных FIGI для подписки на поток рыночных данных")
+            return
+        
+        self._stream_last_message = time.monotonic()
+        self._stream_depth = depth
+        self._stream_orderbooks.clear()
+        self._stream_task = asyncio.create_task(self._run_stream(figi_to_symbol, depth))
+        logger.info(f"Запущен поток рыночных данных для {len(figi_to_symbol)} инструментов")
+    
+    async def stop_stream(self):
+        """Остановка подписки на поток рыночных данных"""
+        if self._stream_task is None:
+            return
+        
+        self._stream_task.cancel()
+        try:
+            await self._stream_task
+        except asyncio.CancelledError:
+            pass
+        self._stream_task = None
+        self._stream_prices.clear()
+        self._stream_orderbooks.clear()
+        self._stream_depth = 0
+        logger.info("Поток рыночных данных остановлен")
+    
+    async def _run_stream(self, figi_to_symbol: Dict[str, str], depth: int):
+        """Чтение потока рыночных данных с переподключением при ошибках"""
+        while True:
+            try:
+                async with AsyncClient(self.token, target=self.target) as client:
+                    stream = client.create_market_data_stream()
+                    stream.last_price.subscribe(
+                        [LastPriceInstrument(figi=figi) for figi in figi_to_symbol]
+                    )
+                    stream.order_book.subscribe(
+                        [OrderBookInstrument(figi=figi, depth=depth) for figi in figi_to_symbol]
+                    )
+                    
+                    async for response in stream:
+                        self._stream_last_message = time.monotonic()
+                        if response.last_price:
+                            self._on_stream_last_price(response.last_price, figi_to_symbol)
+                        if response.orderbook:
+                            self._on_stream_orderbook(response.orderbook, figi_to_symbol)
+                            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка потока рыночных данных: {e}")
+            
+            await asyncio.sleep(STREAM_RECONNECT_DELAY)
+    
+    def _on_stream_last_price(self, last_price, figi_to_symbol: Dict[str, str]):
+        """Обновление кэша цен из потока"""
+        symbol = figi_to_symbol.get(last_price.figi)
+        if not symbol:
+            return
+        
+        price = self._quotation_to_float(last_price.price)
+        self.last_prices_cache[symbol] = price
+        self._stream_prices[symbol] = {
+            'price': price,
+            'timestamp': self.to_iso(last_price.time),
+            'figi': last_price.figi
+        }
+    
+    def _on_stream_orderbook(self, orderbook, figi_to_symbol: Dict[str, str]):
+        """Обновление кэша стаканов из потока"""
+        symbol = figi_to_symbol.get(orderbook.figi)
+        if not symbol:
+            return
+        
+        self._stream_orderbooks[symbol] = self._build_orderbook(
+            symbol,
+            orderbook.figi,
+            orderbook.depth,
+            orderbook.bids,
+            orderbook.asks,
+            self.last_prices_cache.get(symbol, 0.0),
+            self.to_iso(orderbook.time)
+        )
+
+
+class PriceBatcher:
+    """
+    Объединение параллельных запросов цен в один вызов провайдера
+    
+    Запросы, пришедшие в течение короткого окна, сливаются в один запрос
+    по объединенному списку тикеров, результат раздается каждому вызывающему.
+    """
+    
+    def __init__(self, fetch: Callable[[List[str]], Awaitable[Dict[str, Any]]], window: float = PRICE_BATCH_WINDOW):
+        """
+        Args:
+            fetch: Корутина получения данных по списку тикеров
+            window: Окно объединения запросов в секундах
+        """
+        self._fetch = fetch
+        self._window = window
+        self._pending: deque = deque()
+        self._flush_task: Optional[asyncio.Task] = None
+    
+    async def request(self, symbols: List[str]) -> Dict[str, Any]:
+        """Запрос данных по тикерам с объединением в общий пакет"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((list(symbols), future))
+        
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after())
+        
+        return await future
+    
+    def _take_batch(self) -> List[tuple]:
+        """Забрать накопленные запросы; следующий запрос откроет новое окно"""
+        batch = list(self._pending)
+        self._pending.clear()
+        self._flush_task = None
+        return batch
+    
+    async def _flush_after(self):
+        """Выполнение объединенного запроса по истечении окна"""
+        try:
+            await asyncio.sleep(self._window)
+        except asyncio.CancelledError:
+            # Ожидающие запросы не должны зависнуть: отменяем их вместе с пакетом
+            for _, future in self._take_batch():
+                future.cancel()
+            raise
+        batch = self._take_batch()
+        
+        union = list(dict.fromkeys(symbol for symbols, _ in batch for symbol in symbols))
+        try:
+            data = await self._fetch(union)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for symbols, future in batch:
+            if not future.done():
+                future.set_result({symbol: data[symbol] for symbol in symbols if symbol in data})
 
 
 class MultiProviderDataProvider(BaseDataProvider):
@@ -527,22 +967,34 @@ class MultiProviderDataProvider(BaseDataProvider):
     - Другие источники
     """
     
-    def __init__(self, providers: List[BaseDataProvider], primary_provider: str = "tbank"):
+    def __init__(
+        self,
+        providers: List[BaseDataProvider],
+        primary_provider: str = "tbank",
+        hedged_fallback: bool = False
+    ):
         """
         Инициализация множественного провайдера
         
         Args:
             providers: Список провайдеров данных
             primary_provider: Основной провайдер
+            hedged_fallback: Запрашивать исторические данные у всех провайдеров
+                одновременно и брать первый непустой ответ
         """
         self.providers = {provider.__class__.__name__: provider for provider in providers}
         self.primary_provider = primary_provider
+        self.hedged_fallback = hedged_fallback
         self.fallback_providers = [name for name in self.providers.keys() if name != primary_provider]
+        self._price_batcher = PriceBatcher(self._fetch_realtime_data)
         
         logger.info(f"Инициализирован множественный провайдер: {list(self.providers.keys())}")
     
     async def get_historical_data(self, symbol: str, period: str) -> pd.DataFrame:
         """Получение исторических данных с fallback"""
+        if self.hedged_fallback:
+            return await self._get_historical_data_hedged(symbol, period)
+        
         for provider_name in [self.primary_provider] + self.fallback_providers:
             try:
                 provider = self.providers[provider_name]
@@ -557,7 +1009,41 @@ class MultiProviderDataProvider(BaseDataProvider):
         logger.error(f"Не удалось получить данные для {symbol} ни от одного провайдера")
         return pd.DataFrame()
     
+    async def _get_historical_data_hedged(self, symbol: str, period: str) -> pd.DataFrame:
+        """Получение исторических данных одновременно от всех провайдеров (первый непустой ответ)"""
+        tasks = {
+            asyncio.create_task(self.providers[name].get_historical_data(symbol, period)): name
+            for name in [self.primary_provider] + self.fallback_providers
+            if name in self.providers
+        }
+        pending = set(tasks)
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider_name = tasks[task]
+                    try:
+                        data = task.result()
+                    except Exception as e:
+                        logger.warning(f"Ошибка получения данных от {provider_name}: {e}")
+                        continue
+                    if not data.empty:
+                        logger.debug(f"Данные получены от {provider_name}")
+                        return data
+        finally:
+            # Отменяем запросы, которые больше не нужны
+            for task in pending:
+                task.cancel()
+        
+        logger.error(f"Не удалось получить данные для {symbol} ни от одного провайдера")
+        return pd.DataFrame()
+    
     async def get_realtime_data(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Получение данных в реальном времени с fallback (параллельные вызовы объединяются)"""
+        return await self._price_batcher.request(symbols)
+    
+    async def _fetch_realtime_data(self, symbols: List[str]) -> Dict[str, Dict]:
         """Получение данных в реальном времени с fallback"""
         for provider_name in [self.primary_provider] + self.fallback_providers:
             try:
@@ -5,18 +5,113 @@
 
 import pandas as pd
 import numpy as np
+import random
+import zlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from loguru import logger
 import requests
 import json
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Заглушка njit: без numba функция выполняется как обычный Python"""
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True)
+def _random_walk(base_price, total_returns, out_close):
+    """
+    Случайное блуждание цены с ограничением 70%-150% от базовой цены
+    
+    Случайные приращения генерируются заранее, здесь считается только
+    последовательная (детерминированная) рекуррентность.
+    
+    Args:
+        base_price: Базовая цена инструмента
+        total_returns: Дневные доходности (шум + тренд + цикл) длины n
+        out_close: Выходной массив цен закрытия длины n
+    """
+    n = out_close.shape[0]
+    if n == 0:
+        return
+    
+    min_price = base_price * 0.7  # Минимум 70%
+    max_price = base_price * 1.5  # Максимум 150%
+    
+    price = base_price
+    out_close[0] = price
+    for i in range(1, n):
+        price = min(max(price * (1 + total_returns[i]), min_price), max_price)
+        out_close[i] = price
+
 
 class RussianDataProvider:
     """
     Провайдер данных для российских акций
     """
     
+    # Моковые данные для тестирования (реалистичные цены российских акций)
+    mock_data = {
+        'SBER': {
+            'name': 'Сбербанк',
+            'current_price': 250.0,
+            'currency': 'RUB'
+        },
+        'GAZP': {
+            'name': 'Газпром',
+            'current_price': 180.0,
+            'currency': 'RUB'
+        },
+        'LKOH': {
+            'name': 'Лукойл',
+            'current_price': 7500.0,
+            'currency': 'RUB'
+        },
+        'NVTK': {
+            'name': 'Новатэк',
+            'current_price': 1200.0,
+            'currency': 'RUB'
+        },
+        'ROSN': {
+            'name': 'Роснефть',
+            'current_price': 550.0,
+            'currency': 'RUB'
+        },
+        'GMKN': {
+            'name': 'ГМК Норникель',
+            'current_price': 15000.0,
+            'currency': 'RUB'
+        },
+        'YNDX': {
+            'name': 'Яндекс',
+            'current_price': 3500.0,
+            'currency': 'RUB'
+        },
+        'MGNT': {
+            'name': 'Магнит',
+            'current_price': 6000.0,
+            'currency': 'RUB'
+        },
+        'TATN': {
+            'name': 'Татнефть',
+            'current_price': 650.0,
+            'currency': 'RUB'
+        },
+        'SNGS': {
+            'name': 'Сургутнефтегаз',
+            'current_price': 35.0,
+            'currency': 'RUB'
+        }
+    }
+    
     def __init__(self, symbols: List[str]):
         """
         Инициализация провайдера
@@ -26,60 +121,9 @@ class RussianDataProvider:
         """
         self.symbols = symbols
         self.data_cache = {}
-        
-        # Моковые данные для тестирования (реалистичные цены российских акций)
-        self.mock_data = {
-            'SBER': {
-                'name': 'Сбербанк',
-                'current_price': 250.0,
-                'currency': 'RUB'
-            },
-            'GAZP': {
-                'name': 'Газпром',
-                'current_price': 180.0,
-                'currency': 'RUB'
-            },
-            'LKOH': {
-                'name': 'Лукойл',
-                'current_price': 7500.0,
-                'currency': 'RUB'
-            },
-            'NVTK': {
-                'name': 'Новатэк',
-                'current_price': 1200.0,
-                'currency': 'RUB'
-            },
-            'ROSN': {
-                'name': 'Роснефть',
-                'current_price': 550.0,
-                'currency': 'RUB'
-            },
-            'GMKN': {
-                'name': 'ГМК Норникель',
-                'current_price': 15000.0,
-                'currency': 'RUB'
-            },
-            'YNDX': {
-                'name': 'Яндекс',
-                'current_price': 3500.0,
-                'currency': 'RUB'
-            },
-            'MGNT': {
-                'name': 'Магнит',
-                'current_price': 6000.0,
-                'currency': 'RUB'
-            },
-            'TATN': {
-                'name': 'Татнефть',
-                'current_price': 650.0,
-                'currency': 'RUB'
-            },
-            'SNGS': {
-                'name': 'Сургутнефтегаз',
-                'current_price': 35.0,
-                'currency': 'RUB'
-            }
-        }
+        # Генератор для скалярных случайных величин (быстрее numpy для одиночных значений).
+        # Зерно - стабильный хэш списка тикеров: hash() строк меняется между запусками
+        self._rng = random.Random(zlib.crc32(','.join(symbols).encode('utf-8')))
         
         logger.info(f"Инициализирован провайдер российских данных для {len(symbols)} инструментов")
     
@@ -108,38 +152,36 @@ class RussianDataProvider:
             
             # Генерируем реалистичные данные
             base_price = self.mock_data[symbol]['current_price']
-            np.random.seed(hash(symbol) % 2**32)  # Для воспроизводимости
+            n = len(dates)
+            # Для воспроизводимости: зерно от стабильного хэша тикера, все случайные
+            # величины берутся векторно из одного генератора
+            rng = np.random.RandomState(zlib.crc32(symbol.encode('utf-8')))
+            returns = rng.normal(0, 0.02, n)  # 2% волатильность
+            open_noise = rng.normal(0, 0.01, n)
+            high_noise = np.abs(rng.normal(0, 0.02, n))
+            low_noise = np.abs(rng.normal(0, 0.02, n))
+            volume = rng.randint(1000000, 10000000, n).astype(np.int64)
             
-            # Создаем более реалистичное случайное блуждание цен
-            returns = np.random.normal(0, 0.02, len(dates))  # 2% волатильность
-            prices = [base_price]
+            # Очень небольшой восходящий тренд (0.5%) и месячный цикл (0.5%)
+            trend = np.linspace(0, 0.005, n)
+            cycle = 0.005 * np.sin(2 * np.pi * np.arange(n) / 30)
             
-            # Добавляем тренды и циклы для более реалистичных данных
-            trend = np.linspace(0, 0.005, len(dates))  # Очень небольшой восходящий тренд (0.5%)
-            cycle = 0.005 * np.sin(2 * np.pi * np.arange(len(dates)) / 30)  # Небольшой месячный цикл (0.5%)
+            close = np.empty(n, dtype=np.float64)
+            _random_walk(float(base_price), returns + trend + cycle, close)
             
-            for i in range(1, len(dates)):
-                # Комбинируем случайное блуждание, тренд и цикл
-                total_return = returns[i] + trend[i] + cycle[i]
-                new_price = prices[-1] * (1 + total_return)
-                # Ограничиваем разумными пределами
-                new_price = max(new_price, base_price * 0.7)  # Минимум 70%
-                new_price = min(new_price, base_price * 1.5)  # Максимум 150%
-                prices.append(new_price)
+            high = close * (1 + high_noise)
+            low = close * (1 - low_noise)
+            # Убеждаемся, что High >= Low и Close лежит между ними
+            columns = {
+                'Open': close * (1 + open_noise),
+                'High': np.maximum(np.maximum(high, low), close),
+                'Low': np.minimum(low, close),
+                'Close': close,
+                'Volume': volume
+            }
             
             # Создаем DataFrame
-            data = pd.DataFrame({
-                'Open': [p * (1 + np.random.normal(0, 0.01)) for p in prices],
-                'High': [p * (1 + abs(np.random.normal(0, 0.02))) for p in prices],
-                'Low': [p * (1 - abs(np.random.normal(0, 0.02))) for p in prices],
-                'Close': prices,
-                'Volume': [np.random.randint(1000000, 10000000) for _ in range(len(dates))]
-            }, index=dates)
-            
-            # Убеждаемся, что High >= Low
-            data['High'] = np.maximum(data['High'], data['Low'])
-            data['High'] = np.maximum(data['High'], data['Close'])
-            data['Low'] = np.minimum(data['Low'], data['Close'])
+            data = pd.DataFrame(columns, index=dates)
             
             logger.info(f"Сгенерированы моковые данные для {symbol}: {len(data)} дней")
             return data
@@ -162,7 +204,7 @@ class RussianDataProvider:
             if symbol in self.mock_data:
                 # Добавляем небольшое случайное изменение
                 base_price = self.mock_data[symbol]['current_price']
-                change = np.random.normal(0, 0.01)  # 1% волатильность
+                change = self._rng.gauss(0.0, 0.01)  # 1% волатильность
                 return base_price * (1 + change)
             return 0.0
         except Exception as e:
@@ -180,6 +222,7 @@ class RussianDataProvider:
             Словарь с данными по тикерам
         """
         result = {}
+        timestamp = datetime.now()
         
         for symbol in symbols:
             try:
@@ -187,12 +230,12 @@ class RussianDataProvider:
                 
                 result[symbol] = {
                     'price': current_price,
-                    'volume': np.random.randint(1000000, 10000000),
-                    'change': np.random.normal(0, 0.02) * current_price,
-                    'change_percent': np.random.normal(0, 2),
+                    'volume': self._rng.randint(1000000, 9999999),
+                    'change': self._rng.gauss(0.0, 0.02) * current_price,
+                    'change_percent': self._rng.gauss(0.0, 2.0),
                     'bid': current_price * 0.999,  # Bid немного ниже
                     'ask': current_price * 1.001,  # Ask немного выше
-                    'timestamp': datetime.now()
+                    'timestamp': timestamp
                 }
             except Exception as e:
                 logger.error(f"Ошибка получения данных для {symbol}: {e}")
@@ -206,33 +249,56 @@ class RussianDataProvider:
         Returns:
             Словарь с данными по всем символам
         """
-        result = {}
+        symbols = list(self.symbols)
+        n = len(symbols)
+        # Одна отметка времени на весь пакет - все значения логически относятся к одному моменту
+        timestamp = datetime.now().isoformat()
         
-        for symbol in self.symbols:
-            try:
-                current_price = await self.get_current_price(symbol)
-                
-                result[symbol] = {
-                    'price': current_price,
-                    'volume': np.random.randint(1000000, 10000000),
-                    'change': np.random.normal(0, 0.02) * current_price,
-                    'change_percent': np.random.normal(0, 2),
-                    'market_cap': current_price * np.random.randint(1000000, 100000000),
-                    'timestamp': datetime.now().isoformat()
+        try:
+            # Все случайные величины генерируются одним векторным вызовом на поле
+            rng = np.random.default_rng()
+            base_prices = np.array(
+                [self.mock_data[s]['current_price'] if s in self.mock_data else 0.0 for s in symbols],
+                dtype=np.float64
+            )
+            prices = base_prices * (1 + rng.normal(0, 0.01, n))  # 1% волатильность
+            volumes = rng.integers(1000000, 10000000, n)
+            changes = rng.normal(0, 0.02, n) * prices
+            change_percents = rng.normal(0, 2, n)
+            market_caps = prices * rng.integers(1000000, 100000000, n)
+            
+            return {
+                symbol: {
+                    'price': price,
+                    'volume': volume,
+                    'change': change,
+                    'change_percent': change_percent,
+                    'market_cap': market_cap,
+                    'timestamp': timestamp
                 }
-                
-            except Exception as e:
-                logger.error(f"Ошибка получения данных для {symbol}: {e}")
-                result[symbol] = {
+                for symbol, price, volume, change, change_percent, market_cap in zip(
+                    symbols,
+                    prices.tolist(),
+                    volumes.tolist(),
+                    changes.tolist(),
+                    change_percents.tolist(),
+                    market_caps.tolist()
+                )
+            }
+            
+        except Exception as e:
+            logger.error(f"Ошибка получения рыночных данных: {e}")
+            return {
+                symbol: {
                     'price': 0,
                     'volume': 0,
                     'change': 0,
                     'change_percent': 0,
                     'market_cap': 0,
-                    'timestamp': datetime.now().isoformat()
+                    'timestamp': timestamp
                 }
-        
-        return result
+                for symbol in symbols
+            }
     
     def get_symbol_info(self, symbol: str) -> Dict:
         """
@@ -1,24 +1,174 @@
 """
 Провайдер данных через T-Bank (Tinkoff) Invest API
 Поддерживает работу в sandbox и production режимах
+
+Для большого числа параллельных запросов рекомендуется вызвать
+install_uvloop() до asyncio.run(...) - при наличии uvloop он заменит
+стандартный цикл событий.
 """
 
 from typing import Dict, List, Optional
 import pandas as pd
+import numpy as np
 import asyncio
-from datetime import datetime, timedelta
+import sys
+import time
+from collections import OrderedDict
+from functools import partial
+from datetime import date, datetime, timedelta, timezone
 from loguru import logger
 import os
+import pickle
+from pathlib import Path
+
+from .enhanced_tbank_provider import PriceBatcher, STREAM_MAX_SILENCE, STREAM_RECONNECT_DELAY
 
 try:
-    from tinkoff.invest import Client, AsyncClient, CandleInterval, HistoricCandle
+    from tinkoff.invest import Client, AsyncClient, CandleInterval, HistoricCandle, LastPriceInstrument
     from tinkoff.invest.schemas import Share, GetLastPricesResponse
     from tinkoff.invest.constants import INVEST_GRPC_API, INVEST_GRPC_API_SANDBOX
+    from google.protobuf.internal import api_implementation
+    import grpc
     TINKOFF_AVAILABLE = True
 except ImportError:
     TINKOFF_AVAILABLE = False
     logger.warning("Библиотека tinkoff-investments не установлена. T-Bank провайдер недоступен.")
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Начало эпохи Unix для перевода времени свечей в целые наносекунды
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+# Множитель дробной части Quotation (nano) - умножение вместо деления
+_INV_NANO = 1e-9
+
+# Время жизни кэша исторических данных (секунды) в зависимости от интервала свечей
+HISTORICAL_CACHE_TTL = {
+    "1min": 60,
+    "5min": 60,
+    "15min": 60,
+    "hour": 600,
+    "day": 6 * 3600,
+}
+HISTORICAL_CACHE_MAX_SIZE = 256
+
+# Соответствие периода запроса глубине истории
+_PERIOD_MAP = {
+    "1d": timedelta(days=1),
+    "5d": timedelta(days=5),
+    "1mo": timedelta(days=30),
+    "3mo": timedelta(days=90),
+    "6mo": timedelta(days=180),
+    "1y": timedelta(days=365),
+    "2y": timedelta(days=730),
+}
+_DEFAULT_PERIOD = _PERIOD_MAP["1y"]
+
+# Соответствие интервала запроса интервалу свечей API
+if TINKOFF_AVAILABLE:
+    _INTERVAL_MAP = {
+        "1min": CandleInterval.CANDLE_INTERVAL_1_MIN,
+        "5min": CandleInterval.CANDLE_INTERVAL_5_MIN,
+        "15min": CandleInterval.CANDLE_INTERVAL_15_MIN,
+        "hour": CandleInterval.CANDLE_INTERVAL_HOUR,
+        "day": CandleInterval.CANDLE_INTERVAL_DAY,
+    }
+else:
+    _INTERVAL_MAP = {}
+
+
+def install_uvloop() -> bool:
+    """
+    Установка uvloop в качестве цикла событий asyncio
+    
+    Должна вызываться до asyncio.run(...). Без uvloop (например, на Windows)
+    остается стандартный цикл событий.
+    
+    Returns:
+        True, если uvloop установлен
+    """
+    if not UVLOOP_AVAILABLE:
+        logger.debug("uvloop не установлен, используется стандартный цикл событий asyncio")
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Цикл событий asyncio заменен на uvloop")
+    return True
+
+
+class _CandleBuffer:
+    """
+    Накопитель свечей в целочисленных блоках NumPy
+    
+    Поля свечи (units/nano цен, объем, время) копируются как целые числа,
+    а перевод цен в float выполняется векторно для всех свечей сразу.
+    Накопленные значения регулярно сбрасываются в блоки NumPy, чтобы
+    не держать в памяти миллионы объектов Python.
+    
+    Разбор свечей прямо из байтов ответа gRPC не используется: tinkoff-investments
+    не отдает сырые сообщения и сам преобразует их в dataclass-объекты, так что
+    этот буфер - первое место, где можно влиять на обработку свечей.
+    """
+    
+    # Поля одной свечи: 4 цены (units, nano), объем, время в микросекундах
+    _FIELDS = 10
+    
+    def __init__(self, block_size: int = 4096):
+        """
+        Args:
+            block_size: Число свечей в одном блоке
+        """
+        self._block_len = block_size * self._FIELDS
+        self._blocks: List[np.ndarray] = []
+        self._pending: List[int] = []
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, candle):
+        """Добавление свечи"""
+        o, h, l, c = candle.open, candle.high, candle.low, candle.close
+        self._pending.extend((
+            o.units, o.nano, h.units, h.nano, l.units, l.nano, c.units, c.nano,
+            candle.volume, (candle.time - _EPOCH) // _MICROSECOND
+        ))
+        self._size += 1
+        if len(self._pending) >= self._block_len:
+            self._flush()
+    
+    def _flush(self):
+        """Перенос накопленных значений в блок NumPy"""
+        if self._pending:
+            self._blocks.append(np.array(self._pending, dtype=np.int64).reshape(-1, self._FIELDS))
+            self._pending = []
+    
+    def to_df(self) -> pd.DataFrame:
+        """
+        Построение DataFrame из накопленных свечей
+        
+        Returns:
+            DataFrame с колонками Open, High, Low, Close, Volume и индексом Time
+        """
+        self._flush()
+        raw = np.concatenate(self._blocks) if self._blocks else np.empty((0, self._FIELDS), dtype=np.int64)
+        # Цены всех свечей: units + nano * 1e-9 одной векторной операцией
+        prices = raw[:, 0:8:2] + raw[:, 1:8:2] * _INV_NANO
+        return pd.DataFrame(
+            {
+                'Open': prices[:, 0],
+                'High': prices[:, 1],
+                'Low': prices[:, 2],
+                'Close': prices[:, 3],
+                'Volume': raw[:, 8]
+            },
+            index=pd.DatetimeIndex(pd.to_datetime(raw[:, 9] * 1000, unit='ns', utc=True), name='Time')
+        )
+
 
 class TBankDataProvider:
     """
@@ -26,13 +176,23 @@ class TBankDataProvider:
     Документация: https://developer.tbank.ru/invest/intro/developer/sandbox
     """
     
-    def __init__(self, token: str, sandbox: bool = True):
+    def __init__(
+        self,
+        token: str,
+        sandbox: bool = True,
+        instruments_cache_path: Optional[str] = None,
+        compression: Optional[str] = None,
+        min_refresh_seconds: float = 0.5
+    ):
         """
         Инициализация провайдера T-Bank
         
         Args:
             token: API токен T-Bank Invest
             sandbox: Использовать песочницу (True) или prod (False)
+            instruments_cache_path: Файл дневного кэша списка инструментов
+            compression: Сжатие gRPC-канала ("gzip" или "deflate"), по умолчанию без сжатия
+            min_refresh_seconds: Минимальный интервал между запросами цен одного тикера
         """
         if not TINKOFF_AVAILABLE:
             raise ImportError(
@@ -44,36 +204,198 @@ class TBankDataProvider:
         self.sandbox = sandbox
         self.target = INVEST_GRPC_API_SANDBOX if sandbox else INVEST_GRPC_API
         
+        # Параметры gRPC-канала
+        self.channel_options = []
+        if compression:
+            algorithm = {'gzip': grpc.Compression.Gzip, 'deflate': grpc.Compression.Deflate}.get(compression.lower())
+            if algorithm is None:
+                raise ValueError(f"Неподдерживаемое сжатие gRPC: {compression}")
+            self.channel_options.append(('grpc.default_compression_algorithm', int(algorithm)))
+        
         # Кэш данных
-        self.instruments_cache: Dict[str, str] = {}  # ticker -> figi
+        self.instruments_cache: Dict[str, str] = {}  # ticker -> figi (строки интернированы)
         self.last_prices_cache: Dict[str, float] = {}
         self.cache_timestamp: Optional[datetime] = None
         
+        # Данные get_realtime_data моложе min_refresh_seconds отдаются без запроса к API
+        self.min_refresh_seconds = min_refresh_seconds
+        self._realtime_cache: Dict[str, tuple] = {}  # ticker -> (monotonic time, данные)
+        
+        # Список инструментов сохраняется на диск и переиспользуется в течение дня
+        self.instruments_cache_path = Path(
+            instruments_cache_path or f"data/cache/tbank_instruments_{'sandbox' if sandbox else 'prod'}.pkl"
+        )
+        
+        # Постоянное подключение к API (открывается при первом обращении)
+        self._client_cm = None
+        self._client = None
+        
+        # (ticker, period, interval) -> (expires_at, DataFrame), порядок - LRU
+        self._hist_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # (ticker, period, interval) -> задача загрузки, выполняющаяся сейчас
+        self._hist_inflight: Dict[tuple, asyncio.Future] = {}
+        
+        # Одновременные запросы текущих цен объединяются в один get_last_prices
+        self._price_batcher = PriceBatcher(self._fetch_last_prices)
+        
+        # Подписка на поток последних цен (ticker -> данные последнего тика)
+        self._stream_prices: Dict[str, Dict] = {}
+        self._stream_task: Optional[asyncio.Task] = None
+        self._stream_last_message = 0.0  # time.monotonic() последнего сообщения потока
+        
         mode = "SANDBOX" if sandbox else "PRODUCTION"
-        logger.info(f"Инициализирован T-Bank провайдер данных в режиме {mode}")
+        logger.info(
+            f"Инициализирован T-Bank провайдер данных в режиме {mode} "
+            f"(реализация protobuf: {api_implementation.Type()})"
+        )
     
-    async def initialize(self):
+    async def initialize(self, prewarm_tickers: Optional[List[str]] = None):
         """
         Инициализация провайдера - загрузка списка инструментов
+        
+        Args:
+            prewarm_tickers: Тикеры, цены которых нужно сразу загрузить в кэш
         """
         logger.info("Инициализация T-Bank провайдера")
         
         try:
-            async with AsyncClient(self.token, target=self.target) as client:
-                # Загрузка списка акций
-                response = await client.instruments.shares()
-                
-                for share in response.instruments:
-                    # Сохраняем только торгуемые инструменты
-                    if share.api_trade_available_flag:
-                        self.instruments_cache[share.ticker] = share.figi
-                
-                logger.info(f"Загружено {len(self.instruments_cache)} инструментов")
-                
+            if self._load_instruments_from_disk():
+                if prewarm_tickers:
+                    await self.get_realtime_data(prewarm_tickers)
+                logger.info(f"Загружено {len(self.instruments_cache)} инструментов из кэша {self.instruments_cache_path}")
+                return
+            
+            client = await self._get_client()
+            # Загрузка списка акций
+            response = await client.instruments.shares()
+            
+            # Сохраняем только торгуемые инструменты
+            intern = sys.intern
+            self.instruments_cache.update({
+                intern(share.ticker): intern(share.figi)
+                for share in response.instruments
+                if share.api_trade_available_flag
+            })
+            
+            # Облигации, ETF и прогрев цен идут параллельно по одному каналу
+            tasks = [self._load_bonds(), self._load_etfs()]
+            if prewarm_tickers:
+                tasks.append(self.get_realtime_data(prewarm_tickers))
+            bonds_loaded, etfs_loaded = (await asyncio.gather(*tasks))[:2]
+            
+            # Неполный список не сохраняем, чтобы не закрепить его на весь день
+            if bonds_loaded and etfs_loaded:
+                self._save_instruments_to_disk()
+            
+            logger.info(f"Загружено {len(self.instruments_cache)} инструментов")
+            
         except Exception as e:
             logger.error(f"Ошибка инициализации T-Bank провайдера: {e}")
             raise
     
+    async def _load_bonds(self) -> bool:
+        """Загрузка торгуемых облигаций в кэш инструментов"""
+        try:
+            client = await self._get_client()
+            response = await client.instruments.bonds()
+            # Уже загруженные инструменты (акции) имеют приоритет при совпадении тикеров
+            intern, cache = sys.intern, self.instruments_cache
+            cache.update({
+                intern(bond.ticker): intern(bond.figi)
+                for bond in response.instruments
+                if bond.api_trade_available_flag and bond.ticker not in cache
+            })
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить облигации: {e}")
+            return False
+    
+    async def _load_etfs(self) -> bool:
+        """Загрузка торгуемых ETF в кэш инструментов"""
+        try:
+            client = await self._get_client()
+            response = await client.instruments.etfs()
+            # Уже загруженные инструменты (акции) имеют приоритет при совпадении тикеров
+            intern, cache = sys.intern, self.instruments_cache
+            cache.update({
+                intern(etf.ticker): intern(etf.figi)
+                for etf in response.instruments
+                if etf.api_trade_available_flag and etf.ticker not in cache
+            })
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить ETF: {e}")
+            return False
+    
+    def _load_instruments_from_disk(self) -> bool:
+        """
+        Загрузка списка инструментов из дневного кэша на диске
+        
+        Returns:
+            True, если кэш за сегодняшний день найден и загружен
+        """
+        try:
+            if not self.instruments_cache_path.exists():
+                return False
+            with open(self.instruments_cache_path, 'rb') as f:
+                cache_date, instruments = pickle.load(f)
+            if cache_date != date.today() or not instruments:
+                return False
+            self.instruments_cache.update(
+                (sys.intern(ticker), sys.intern(figi)) for ticker, figi in instruments.items()
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать кэш инструментов {self.instruments_cache_path}: {e}")
+            return False
+    
+    def _save_instruments_to_disk(self):
+        """Сохранение списка инструментов в дневной кэш на диске"""
+        try:
+            self.instruments_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.instruments_cache_path, 'wb') as f:
+                pickle.dump((date.today(), self.instruments_cache), f)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить кэш инструментов {self.instruments_cache_path}: {e}")
+    
+    async def _get_client(self):
+        """
+        Получение постоянного клиента API (создается один раз и переиспользуется)
+        
+        Returns:
+            Открытый клиент T-Bank API
+        """
+        if self._client is None:
+            if self.channel_options:
+                client_cm = AsyncClient(self.token, target=self.target, options=self.channel_options)
+            else:
+                client_cm = AsyncClient(self.token, target=self.target)
+            client = await client_cm.__aenter__()
+            if self._client is None:
+                self._client_cm = client_cm
+                self._client = client
+            else:
+                # Параллельный вызов уже открыл подключение - лишнее закрываем
+                await client_cm.__aexit__(None, None, None)
+        return self._client
+    
+    async def close(self):
+        """
+        Закрытие постоянного подключения к API
+        """
+        await self.stop_price_stream()
+        
+        if self._client_cm is None:
+            return
+        
+        client_cm = self._client_cm
+        self._client_cm = None
+        self._client = None
+        try:
+            await client_cm.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Ошибка закрытия подключения к T-Bank API: {e}")
+    
     async def _ticker_to_figi(self, ticker: str) -> Optional[str]:
         """
         Конвертация тикера в FIGI (динамически, не зависит от конфигурации)
@@ -90,34 +412,34 @@ class TBankDataProvider:
         
         # Если не в кэше - ищем динамически через API
         try:
-            async with AsyncClient(self.token, target=self.target) as client:
-                # Поиск в акциях
-                shares_response = await client.instruments.shares()
-                for share in shares_response.instruments:
-                    if share.ticker.upper() == ticker.upper() and share.api_trade_available_flag:
-                        self.instruments_cache[ticker] = share.figi
-                        logger.debug(f"Найден FIGI для {ticker} через динамический поиск: {share.figi}")
-                        return share.figi
-                
-                # Поиск в облигациях
-                bonds_response = await client.instruments.bonds()
-                for bond in bonds_response.instruments:
-                    if bond.ticker.upper() == ticker.upper() and bond.api_trade_available_flag:
-                        self.instruments_cache[ticker] = bond.figi
-                        logger.debug(f"Найден FIGI для {ticker} (облигация) через динамический поиск: {bond.figi}")
-                        return bond.figi
-                
-                # Поиск в ETF
-                etfs_response = await client.instruments.etfs()
-                for etf in etfs_response.instruments:
-                    if etf.ticker.upper() == ticker.upper() and etf.api_trade_available_flag:
-                        self.instruments_cache[ticker] = etf.figi
-                        logger.debug(f"Найден FIGI для {ticker} (ETF) через динамический поиск: {etf.figi}")
-                        return etf.figi
-                
-                logger.warning(f"FIGI не найден для тикера {ticker} через динамический поиск")
-                return None
-                
+            client = await self._get_client()
+            # Поиск в акциях
+            shares_response = await client.instruments.shares()
+            for share in shares_response.instruments:
+                if share.ticker.upper() == ticker.upper() and share.api_trade_available_flag:
+                    self.instruments_cache[sys.intern(ticker)] = sys.intern(share.figi)
+                    logger.debug(f"Найден FIGI для {ticker} через динамический поиск: {share.figi}")
+                    return share.figi
+            
+            # Поиск в облигациях
+            bonds_response = await client.instruments.bonds()
+            for bond in bonds_response.instruments:
+                if bond.ticker.upper() == ticker.upper() and bond.api_trade_available_flag:
+                    self.instruments_cache[sys.intern(ticker)] = sys.intern(bond.figi)
+                    logger.debug(f"Найден FIGI для {ticker} (облигация) через динамический поиск: {bond.figi}")
+                    return bond.figi
+            
+            # Поиск в ETF
+            etfs_response = await client.instruments.etfs()
+            for etf in etfs_response.instruments:
+                if etf.ticker.upper() == ticker.upper() and etf.api_trade_available_flag:
+                    self.instruments_cache[sys.intern(ticker)] = sys.intern(etf.figi)
+                    logger.debug(f"Найден FIGI для {ticker} (ETF) через динамический поиск: {etf.figi}")
+                    return etf.figi
+            
+            logger.warning(f"FIGI не найден для тикера {ticker} через динамический поиск")
+            return None
+            
         except Exception as e:
             logger.error(f"Ошибка динамического поиска FIGI для {ticker}: {e}")
             return None
@@ -139,6 +461,51 @@ class TBankDataProvider:
         Returns:
             DataFrame с историческими данными (OHLCV)
         """
+        cache_key = (ticker, period, interval)
+        cached = self._hist_cache.get(cache_key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._hist_cache.move_to_end(cache_key)
+            logger.debug(f"Исторические данные для {ticker} взяты из кэша")
+            return cached[1].copy(deep=False)
+        
+        # Параллельные запросы тех же данных ждут уже идущую загрузку
+        task = self._hist_inflight.get(cache_key)
+        if task is not None:
+            logger.debug(f"Ожидание уже идущей загрузки исторических данных для {ticker}")
+        else:
+            task = asyncio.ensure_future(self._load_historical_data(ticker, period, interval, cached))
+            self._hist_inflight[cache_key] = task
+            task.add_done_callback(partial(self._forget_hist_inflight, cache_key))
+        
+        # Каждый вызывающий, включая начавшего загрузку, получает копию:
+        # DataFrame из кэша наружу не отдается
+        df = await asyncio.shield(task)
+        return df.copy(deep=False)
+    
+    def _forget_hist_inflight(self, cache_key: tuple, _task: asyncio.Future) -> None:
+        """Удаление завершенной загрузки исторических данных из списка выполняющихся"""
+        self._hist_inflight.pop(cache_key, None)
+    
+    async def _load_historical_data(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        cached: Optional[tuple]
+    ) -> pd.DataFrame:
+        """
+        Загрузка исторических данных из API с дополнением устаревшего кэша
+        
+        Args:
+            ticker: Тикер инструмента
+            period: Период данных
+            interval: Интервал свечей
+            cached: Устаревшая запись кэша (expires_at, DataFrame) или None
+            
+        Returns:
+            DataFrame с историческими данными (OHLCV)
+        """
+        cache_key = (ticker, period, interval)
         try:
             figi = await self._ticker_to_figi(ticker)
             if not figi:
@@ -146,64 +513,76 @@ class TBankDataProvider:
                 return pd.DataFrame()
             
             # Конвертация периода в даты
-            to_date = datetime.now()
-            period_map = {
-                "1d": timedelta(days=1),
-                "5d": timedelta(days=5),
-                "1mo": timedelta(days=30),
-                "3mo": timedelta(days=90),
-                "6mo": timedelta(days=180),
-                "1y": timedelta(days=365),
-                "2y": timedelta(days=730),
-            }
-            from_date = to_date - period_map.get(period, timedelta(days=365))
+            to_date = datetime.now(timezone.utc)
+            from_date = to_date - _PERIOD_MAP.get(period, _DEFAULT_PERIOD)
             
             # Конвертация интервала
-            interval_map = {
-                "1min": CandleInterval.CANDLE_INTERVAL_1_MIN,
-                "5min": CandleInterval.CANDLE_INTERVAL_5_MIN,
-                "15min": CandleInterval.CANDLE_INTERVAL_15_MIN,
-                "hour": CandleInterval.CANDLE_INTERVAL_HOUR,
-                "day": CandleInterval.CANDLE_INTERVAL_DAY,
-            }
-            candle_interval = interval_map.get(interval, CandleInterval.CANDLE_INTERVAL_DAY)
-            
-            async with AsyncClient(self.token, target=self.target) as client:
-                candles = []
-                async for candle in client.get_all_candles(
-                    figi=figi,
-                    from_=from_date,
-                    to=to_date,
-                    interval=candle_interval,
-                ):
-                    candles.append(candle)
-                
-                # Конвертация в DataFrame
-                if not candles:
-                    logger.warning(f"Нет данных для {ticker}")
-                    return pd.DataFrame()
-                
-                data = []
-                for candle in candles:
-                    data.append({
-                        'Open': self._quotation_to_float(candle.open),
-                        'High': self._quotation_to_float(candle.high),
-                        'Low': self._quotation_to_float(candle.low),
-                        'Close': self._quotation_to_float(candle.close),
-                        'Volume': candle.volume,
-                        'Time': candle.time
-                    })
-                
-                df = pd.DataFrame(data)
-                df.set_index('Time', inplace=True)
-                
-                logger.debug(f"Получены исторические данные для {ticker}: {len(df)} записей")
-                return df
-                
+            candle_interval = _INTERVAL_MAP.get(interval, CandleInterval.CANDLE_INTERVAL_DAY)
+            
+            # Устаревшая запись кэша дополняется только новыми свечами
+            previous = cached[1] if cached is not None and not cached[1].empty else None
+            fetch_from = previous.index[-1].to_pydatetime() if previous is not None else from_date
+            
+            client = await self._get_client()
+            # Свечи сразу раскладываются по колонкам, объекты ответа не накапливаются
+            buffer = _CandleBuffer()
+            async for candle in client.get_all_candles(
+                figi=figi,
+                from_=fetch_from,
+                to=to_date,
+                interval=candle_interval,
+            ):
+                buffer.append(candle)
+            
+            # Конвертация в DataFrame
+            if not len(buffer) and previous is None:
+                logger.warning(f"Нет данных для {ticker}")
+                return pd.DataFrame()
+            
+            # Сборка DataFrame выполняется в отдельном потоке, чтобы не блокировать event loop
+            df = await asyncio.to_thread(self._build_history_df, buffer, previous, from_date)
+            
+            self._store_cached_historical(cache_key, interval, df)
+            
+            logger.debug(f"Получены исторические данные для {ticker}: {len(df)} записей ({len(buffer)} загружено)")
+            return df
+            
         except Exception as e:
             logger.error(f"Ошибка получения исторических данных для {ticker}: {e}")
             return pd.DataFrame()
     
+    @staticmethod
+    def _build_history_df(
+        buffer: _CandleBuffer,
+        previous: Optional[pd.DataFrame],
+        from_date: datetime
+    ) -> pd.DataFrame:
+        """
+        Построение DataFrame из загруженных свечей с учетом ранее сохраненных
+        
+        Args:
+            buffer: Буфер загруженных свечей
+            previous: Ранее сохраненные данные или None
+            from_date: Начало запрошенного периода
+            
+        Returns:
+            DataFrame с историческими данными
+        """
+        df = buffer.to_df()
+        if previous is not None:
+            # Последняя сохраненная свеча могла быть незавершенной - берем свежую версию
+            df = pd.concat([previous, df])
+            df = df[~df.index.duplicated(keep='last')]
+            df = df[df.index >= from_date]
+        return df
+    
+    def _store_cached_historical(self, key: tuple, interval: str, df: pd.DataFrame):
+        """Сохранение исторических данных в кэш с вытеснением давно использованных записей"""
+        self._hist_cache[key] = (time.monotonic() + HISTORICAL_CACHE_TTL.get(interval, HISTORICAL_CACHE_TTL["day"]), df)
+        self._hist_cache.move_to_end(key)
+        while len(self._hist_cache) > HISTORICAL_CACHE_MAX_SIZE:
+            self._hist_cache.popitem(last=False)
+    
     async def get_current_price(self, ticker: str) -> float:
         """
         Получение текущей цены инструмента
@@ -214,27 +593,53 @@ class TBankDataProvider:
         Returns:
             Текущая цена
         """
+        stream_data = self._stream_prices.get(ticker)
+        if stream_data is not None and self.is_streaming:
+            return stream_data['price']
+        
         try:
-            figi = await self._ticker_to_figi(ticker)
-            if not figi:
-                logger.warning(f"FIGI не найден для тикера {ticker}")
-                return 0.0
+            prices = await self._price_batcher.request([ticker])
+            return prices.get(ticker, 0.0)
             
-            async with AsyncClient(self.token, target=self.target) as client:
-                # Получение последней цены
-                response = await client.market_data.get_last_prices(figi=[figi])
-                
-                if response.last_prices:
-                    price = self._quotation_to_float(response.last_prices[0].price)
-                    self.last_prices_cache[ticker] = price
-                    return price
-                
-                return 0.0
-                
         except Exception as e:
             logger.error(f"Ошибка получения текущей цены для {ticker}: {e}")
             return 0.0
     
+    async def _fetch_last_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """
+        Получение последних цен одним запросом для нескольких инструментов
+        
+        Args:
+            tickers: Список тикеров
+            
+        Returns:
+            Словарь тикер -> цена
+        """
+        figi_to_ticker = {}
+        for ticker in tickers:
+            figi = await self._ticker_to_figi(ticker)
+            if figi:
+                figi_to_ticker[figi] = ticker
+            else:
+                logger.warning(f"FIGI не найден для тикера {ticker}")
+        
+        if not figi_to_ticker:
+            return {}
+        
+        client = await self._get_client()
+        # Получение последних цен
+        response = await client.market_data.get_last_prices(figi=list(figi_to_ticker))
+        
+        prices = {}
+        for last_price in response.last_prices:
+            ticker = figi_to_ticker.get(last_price.figi)
+            if ticker:
+                price = self._quotation_to_float(last_price.price)
+                self.last_prices_cache[ticker] = price
+                prices[ticker] = price
+        
+        return prices
+    
     async def get_realtime_data(self, tickers: List[str]) -> Dict[str, Dict]:
         """
         Получение данных в реальном времени для нескольких инструментов
@@ -247,6 +652,25 @@ class TBankDataProvider:
         """
         result = {}
         
+        if self.is_streaming:
+            # Данные из потока - основной источник, API только для недостающих тикеров
+            result = {ticker: self._stream_prices[ticker] for ticker in tickers if ticker in self._stream_prices}
+            tickers = [ticker for ticker in tickers if ticker not in result]
+            if not tickers:
+                return result
+        
+        # Недавно полученные данные не запрашиваются повторно
+        fresh_after = time.monotonic() - self.min_refresh_seconds
+        realtime_cache = self._realtime_cache
+        for ticker in tickers:
+            cached = realtime_cache.get(ticker)
+            if cached is not None and cached[0] > fresh_after:
+                result[ticker] = cached[1]
+        if result:
+            tickers = [ticker for ticker in tickers if ticker not in result]
+            if not tickers:
+                return result
+        
         try:
             # Конвертация тикеров в FIGI
             figis = []
@@ -261,36 +685,134 @@ class TBankDataProvider:
                 logger.warning("Не найдено FIGI для запрошенных тикеров")
                 return result
             
-            async with AsyncClient(self.token, target=self.target) as client:
-                # Получение последних цен
-                response = await client.market_data.get_last_prices(figi=figis)
-                
-                for last_price in response.last_prices:
-                    ticker = ticker_to_figi.get(last_price.figi)
-                    if ticker:
-                        price = self._quotation_to_float(last_price.price)
-                        
-                        # Получение дополнительной информации (дневные изменения)
-                        # В продакшене можно использовать стримы для real-time данных
-                        result[ticker] = {
-                            'price': price,
-                            'figi': last_price.figi,
-                            'timestamp': last_price.time.isoformat() if last_price.time else datetime.now().isoformat(),
-                            'change': 0.0,  # Требует дополнительного запроса
-                            'change_percent': 0.0,
-                            'volume': 0,
-                        }
-                        
-                        self.last_prices_cache[ticker] = price
-                
-                self.cache_timestamp = datetime.now()
-                logger.debug(f"Обновлены цены для {len(result)} инструментов")
-                
+            client = await self._get_client()
+            # Получение последних цен
+            response = await client.market_data.get_last_prices(figi=figis)
+            
+            # Одно время на весь ответ - для цен без отметки времени и для кэша
+            now = datetime.now()
+            now_iso = now.isoformat()
+            received_at = time.monotonic()
+            
+            for last_price in response.last_prices:
+                ticker = ticker_to_figi.get(last_price.figi)
+                if ticker:
+                    price = self._quotation_to_float(last_price.price)
+                    
+                    # Получение дополнительной информации (дневные изменения)
+                    # В продакшене можно использовать стримы для real-time данных
+                    result[ticker] = {
+                        'price': price,
+                        'figi': last_price.figi,
+                        'timestamp': last_price.time.isoformat() if last_price.time else now_iso,
+                        'change': 0.0,  # Требует дополнительного запроса
+                        'change_percent': 0.0,
+                        'volume': 0,
+                    }
+                    
+                    self.last_prices_cache[ticker] = price
+                    self._realtime_cache[ticker] = (received_at, result[ticker])
+            
+            self.cache_timestamp = now
+            logger.debug(f"Обновлены цены для {len(result)} инструментов")
+            
         except Exception as e:
             logger.error(f"Ошибка получения данных в реальном времени: {e}")
         
         return result
     
+    @property
+    def is_streaming(self) -> bool:
+        """Активна ли подписка на поток последних цен и поступают ли из нее сообщения"""
+        return (
+            self._stream_task is not None
+            and not self._stream_task.done()
+            and time.monotonic() - self._stream_last_message < STREAM_MAX_SILENCE
+        )
+    
+    async def start_price_stream(self, tickers: List[str]):
+        """
+        Запуск подписки на поток последних цен
+        
+        Пока поток активен, get_realtime_data и get_current_price отдают цены
+        из кэша, обновляемого потоком, и обращаются к API только для
+        отсутствующих в нем тикеров. Если сообщений нет дольше
+        STREAM_MAX_SILENCE (обрыв, переподключение), цены снова берутся опросом API.
+        
+        Args:
+            tickers: Список тикеров
+        """
+        if self._stream_task is not None and not self._stream_task.done():
+            return
+        
+        figi_to_ticker = {}
+        for ticker in tickers:
+            figi = await self._ticker_to_figi(ticker)
+            if figi:
+                figi_to_ticker[figi] = ticker
+        
+        if not figi_to_ticker:
+            logger.warning("Нет доступных FIGI для подписки на поток цен")
+            return
+        
+        self._stream_last_message = time.monotonic()
+        self._stream_task = asyncio.create_task(self._run_price_stream(figi_to_ticker))
+        logger.info(f"Запущен поток цен для {len(figi_to_ticker)} инструментов")
+    
+    async def stop_price_stream(self):
+        """Остановка подписки на поток последних цен"""
+        if self._stream_task is None:
+            return
+        
+        self._stream_task.cancel()
+        try:
+            await self._stream_task
+        except asyncio.CancelledError:
+            pass
+        self._stream_task = None
+        self._stream_prices.clear()
+        logger.info("Поток цен остановлен")
+    
+    async def _run_price_stream(self, figi_to_ticker: Dict[str, str]):
+        """Чтение потока последних цен с переподключением при ошибках"""
+        while True:
+            try:
+                client = await self._get_client()
+                stream = client.create_market_data_stream()
+                stream.last_price.subscribe(
+                    [LastPriceInstrument(figi=figi) for figi in figi_to_ticker]
+                )
+                
+                async for response in stream:
+                    self._stream_last_message = time.monotonic()
+                    if response.last_price:
+                        self._on_stream_last_price(response.last_price, figi_to_ticker)
+                        
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка потока цен T-Bank: {e}")
+            
+            await asyncio.sleep(STREAM_RECONNECT_DELAY)
+    
+    def _on_stream_last_price(self, last_price, figi_to_ticker: Dict[str, str]):
+        """Обновление кэша цен из потока"""
+        ticker = figi_to_ticker.get(last_price.figi)
+        if not ticker:
+            return
+        
+        price = last_price.price.units + last_price.price.nano * _INV_NANO
+        self.last_prices_cache[ticker] = price
+        self._stream_prices[ticker] = {
+            'price': price,
+            'figi': last_price.figi,
+            'timestamp': last_price.time.isoformat() if last_price.time else datetime.now().isoformat(),
+            'change': 0.0,
+            'change_percent': 0.0,
+            'volume': 0,
+        }
+        self.cache_timestamp = datetime.now()
+    
     async def get_orderbook(self, ticker: str, depth: int = 10) -> Dict:
         """
         Получение стакана заявок
@@ -308,32 +830,28 @@ class TBankDataProvider:
                 logger.warning(f"FIGI не найден для тикера {ticker}")
                 return {}
             
-            async with AsyncClient(self.token, target=self.target) as client:
-                response = await client.market_data.get_order_book(
-                    figi=figi,
-                    depth=depth
-                )
-                
-                return {
-                    'figi': figi,
-                    'depth': depth,
-                    'bids': [
-                        {
-                            'price': self._quotation_to_float(bid.price),
-                            'quantity': bid.quantity
-                        }
-                        for bid in response.bids
-                    ],
-                    'asks': [
-                        {
-                            'price': self._quotation_to_float(ask.price),
-                            'quantity': ask.quantity
-                        }
-                        for ask in response.asks
-                    ],
-                    'last_price': self._quotation_to_float(response.last_price) if response.last_price else 0.0,
-                }
-                
+            client = await self._get_client()
+            response = await client.market_data.get_order_book(
+                figi=figi,
+                depth=depth
+            )
+            
+            # Уровни стакана возвращаются колонками NumPy
+            bids, asks = response.bids, response.asks
+            return {
+                'figi': figi,
+                'depth': depth,
+                'bid_price': np.fromiter(
+                    (bid.price.units + bid.price.nano * _INV_NANO for bid in bids), dtype=np.float64, count=len(bids)
+                ),
+                'bid_qty': np.fromiter((bid.quantity for bid in bids), dtype=np.int64, count=len(bids)),
+                'ask_price': np.fromiter(
+                    (ask.price.units + ask.price.nano * _INV_NANO for ask in asks), dtype=np.float64, count=len(asks)
+                ),
+                'ask_qty': np.fromiter((ask.quantity for ask in asks), dtype=np.int64, count=len(asks)),
+                'last_price': self._quotation_to_float(response.last_price) if response.last_price else 0.0,
+            }
+            
         except Exception as e:
             logger.error(f"Ошибка получения стакана для {ticker}: {e}")
             return {}
@@ -350,7 +868,7 @@ class TBankDataProvider:
         """
         if quotation is None:
             return 0.0
-        return quotation.units + quotation.nano / 1_000_000_000
+        return quotation.units + quotation.nano * _INV_NANO
     
     async def search_instrument(self, query: str) -> List[Dict]:
         """
@@ -363,21 +881,21 @@ class TBankDataProvider:
             Список найденных инструментов
         """
         try:
-            async with AsyncClient(self.token, target=self.target) as client:
-                response = await client.instruments.find_instrument(query=query)
-                
-                instruments = []
-                for instrument in response.instruments:
-                    instruments.append({
-                        'ticker': instrument.ticker,
-                        'figi': instrument.figi,
-                        'name': instrument.name,
-                        'type': instrument.instrument_type,
-                        'currency': instrument.currency,
-                    })
-                
-                return instruments
-                
+            client = await self._get_client()
+            response = await client.instruments.find_instrument(query=query)
+            
+            instruments = []
+            for instrument in response.instruments:
+                instruments.append({
+                    'ticker': instrument.ticker,
+                    'figi': instrument.figi,
+                    'name': instrument.name,
+                    'type': instrument.instrument_type,
+                    'currency': instrument.currency,
+                })
+            
+            return instruments
+            
         except Exception as e:
             logger.error(f"Ошибка поиска инструментов по запросу '{query}': {e}")
             return []
@@ -2,6 +2,134 @@
 
 const { createApp } = Vue;
 
+// Форматтеры создаются один раз: построение Intl-объекта заметно дороже форматирования
+const CURRENCY_FORMAT = new Intl.NumberFormat('ru-RU', {
+    style: 'currency',
+    currency: 'RUB',
+    minimumFractionDigits: 0,
+    maximumFractionDigits: 0
+});
+const TIME_FORMAT = new Intl.DateTimeFormat('ru-RU', {
+    day: '2-digit',
+    month: '2-digit',
+    year: 'numeric',
+    hour: '2-digit',
+    minute: '2-digit',
+    second: '2-digit'
+});
+const CHART_LABEL_FORMAT = new Intl.DateTimeFormat('ru-RU', {
+    day: '2-digit',
+    month: '2-digit',
+    hour: '2-digit',
+    minute: '2-digit'
+});
+
+// Поля формы настроек: путь в конфигурации и значение по умолчанию.
+// Из этой таблицы строятся начальные значения формы, загрузка и сохранение
+const CONFIG_FIELDS = {
+    initial_capital: { path: 'portfolio.initial_capital', default: 0 },
+    signal_threshold: { path: 'signals.threshold', default: 0.7 },
+    sandbox: { path: 'tinkoff.sandbox', default: true }
+};
+
+// Числовые поля настроек портфеля: разметка формы строится по этому описанию.
+// Объект заморожен, поэтому Vue не оборачивает его в реактивный прокси
+const NUMBER_FIELDS = Object.freeze([
+    { field: 'initial_capital', label: 'Начальный капитал (₽):', min: 0, step: 10000 },
+    {
+        field: 'signal_threshold',
+        label: 'Порог сигнала (0-1):',
+        min: 0,
+        max: 1,
+        step: 0.05,
+        help: 'Минимальная уверенность для исполнения торговых сигналов'
+    }
+]);
+
+// Подписи и CSS классы режимов данных портфеля, а также режимов подключения T-Bank.
+// Таблицы строятся один раз, а не при каждой отрисовке
+const MODE_TEXTS = Object.freeze({
+    real: 'T-Bank API',
+    system: 'Торговая система',
+    file: 'Сохраненные данные',
+    empty: 'Нет данных'
+});
+const MODE_CLASSES = Object.freeze({
+    real: 'positive',
+    system: 'positive',
+    file: 'warning',
+    empty: 'negative'
+});
+const TBANK_MODE_TEXTS = Object.freeze({
+    sandbox: 'Песочница (Sandbox)',
+    production: 'Боевой режим (Production)'
+});
+
+// Общий POST-запрос с JSON-телом к API: заголовки создаются один раз, а не при каждом запросе
+const JSON_HEADERS = Object.freeze({ 'Content-Type': 'application/json' });
+
+function postJson(url, payload) {
+    return fetch(url, {
+        method: 'POST',
+        headers: JSON_HEADERS,
+        body: JSON.stringify(payload)
+    });
+}
+
+// Выполнение шагов по одному в периоды простоя браузера,
+// чтобы отрисовка и ввод обрабатывались между шагами
+function runWhenIdle(steps) {
+    const schedule = window.requestIdleCallback || ((callback) => setTimeout(callback, 0));
+    const runNext = () => {
+        const step = steps.shift();
+        if (step) {
+            step();
+            schedule(runNext);
+        }
+    };
+    schedule(runNext);
+}
+
+// Чтение значения по пути вида 'section.key': путь разбирается один раз при создании функции
+function makeConfigGetter(path) {
+    const keys = path.split('.');
+    return (config) => {
+        let node = config;
+        for (const key of keys) {
+            if (node == null) return undefined;
+            node = node[key];
+        }
+        return node;
+    };
+}
+
+// Запись значения по пути вида 'section.key' с созданием промежуточных секций
+function makeConfigSetter(path) {
+    const keys = path.split('.');
+    const last = keys.pop();
+    return (config, value) => {
+        let node = config;
+        for (const key of keys) {
+            node = (node[key] ??= {});
+        }
+        node[last] = value;
+    };
+}
+
+// Поле формы, функция чтения и функция записи для каждого пути CONFIG_FIELDS
+const CONFIG_ACCESSORS = Object.entries(CONFIG_FIELDS).map(
+    ([field, { path }]) => [field, makeConfigGetter(path), makeConfigSetter(path)]
+);
+
+// Тело запроса сохранения: вложенные секции создаются один раз,
+// при каждом сохранении обновляются только значения
+const CONFIG_PAYLOAD = {};
+
+// Значения полей формы по умолчанию
+const CONFIG_DEFAULTS = Object.fromEntries(
+    Object.entries(CONFIG_FIELDS).map(([field, spec]) => [field, spec.default])
+);
+
 createApp({
     data() {
         return {
@@ -41,11 +169,10 @@ createApp({
             signals: [],
             
             // Конфигурация
+            numberFields: NUMBER_FIELDS,
             config: {
                 tbank_token: '',
-                sandbox: true,
-                initial_capital: 0,
-                signal_threshold: 0.7,
+                ...CONFIG_DEFAULTS,
                 symbols_text: 'SBER, GAZP, LKOH, YNDX, GMKN'
             },
             
@@ -55,10 +182,19 @@ createApp({
             
             // Статус подключения
             connectionStatus: null,
+            checkingConnection: false,
             
             // Модальное окно
             showTokenModal: false,
             
+            // Вкладки, данные которых уже загружены. Конфигурация загружается
+            // при старте: режим sandbox из нее нужен кнопке подключения на дашборде
+            loadedTabs: new Set(['dashboard', 'config']),
+            configLoading: null,
+            
+            // Запланированное обновление графиков
+            chartsUpdatePending: false,
+            
             // WebSocket
             ws: null,
             reconnectInterval: null
@@ -68,12 +204,11 @@ createApp({
     mounted() {
         console.log('🚀 Neyro-Invest Web GUI загружен');
         
-        // Загрузка данных
+        // Загрузка данных дашборда и конфигурации; данные остальных вкладок - при первом открытии
         this.loadSystemStatus();
         this.loadPortfolio();
-        this.loadSignals();
-        this.loadConfig();
         this.loadTbankToken();
+        this.configLoading = this.loadConfig();
         
         // Подключение WebSocket
         this.connectWebSocket();
@@ -107,6 +242,23 @@ createApp({
         switchTab(tabId) {
             console.log('🔄 Переключение на вкладку:', tabId);
             this.currentTab = tabId;
+            
+            if (!this.loadedTabs.has(tabId)) {
+                this.loadedTabs.add(tabId);
+                this.loadTabData(tabId);
+            }
+        },
+        
+        // Первичная загрузка данных вкладки
+        loadTabData(tabId) {
+            switch (tabId) {
+                case 'trading':
+                    this.loadSignals();
+                    break;
+                case 'logs':
+                    this.loadLogs();
+                    break;
+            }
         },
         
         // Форматирование валюты
@@ -114,48 +266,37 @@ createApp({
             if (value === null || value === undefined || isNaN(value) || value === 'не число') {
                 return '0 ₽';
             }
-            return new Intl.NumberFormat('ru-RU', {
-                style: 'currency',
-                currency: 'RUB',
-                minimumFractionDigits: 0,
-                maximumFractionDigits: 0
-            }).format(Number(value));
+            return CURRENCY_FORMAT.format(Number(value));
+        },
+        
+        // Форматирование суммы, которой может не быть: вместо 0 ₽ показывается прочерк
+        formatOptionalCurrency(value) {
+            if (typeof value !== 'number' || isNaN(value)) {
+                return '—';
+            }
+            return CURRENCY_FORMAT.format(value);
         },
         
         // Форматирование времени
         formatTime(timestamp) {
             if (!timestamp) return '-';
             const date = new Date(timestamp);
-            return date.toLocaleString('ru-RU', {
-                day: '2-digit',
-                month: '2-digit',
-                year: 'numeric',
-                hour: '2-digit',
-                minute: '2-digit',
-                second: '2-digit'
-            });
+            return TIME_FORMAT.format(date);
         },
         
         // Получение текста режима данных
         getModeText(mode) {
-            const modes = {
-                'real': 'T-Bank API',
-                'system': 'Торговая система',
-                'file': 'Сохраненные данные',
-                'empty': 'Нет данных'
-            };
-            return modes[mode] || 'Неизвестно';
+            return MODE_TEXTS[mode] || 'Неизвестно';
         },
         
         // Получение CSS класса для режима
         getModeClass(mode) {
-            const classes = {
-                'real': 'positive',
-                'system': 'positive',
-                'file': 'warning',
-                'empty': 'negative'
-            };
-            return classes[mode] || '';
+            return MODE_CLASSES[mode] || '';
+        },
+        
+        // Получение текста режима подключения T-Bank
+        getTbankModeText(mode) {
+            return TBANK_MODE_TEXTS[mode] || TBANK_MODE_TEXTS.production;
         },
         
         // WebSocket подключение
@@ -174,9 +315,25 @@ createApp({
                     }
                 };
                 
+                // Обновления портфеля, пришедшие за один кадр, объединяются
+                // и применяются одним присваиванием
+                let portfolioPatch = null;
                 this.ws.onmessage = (event) => {
                     const message = JSON.parse(event.data);
-                    this.handleWebSocketMessage(message);
+                    if (message.type !== 'portfolio_update') {
+                        this.handleWebSocketMessage(message);
+                        return;
+                    }
+                    if (portfolioPatch) {
+                        Object.assign(portfolioPatch, message.data);
+                        return;
+                    }
+                    portfolioPatch = { ...message.data };
+                    requestAnimationFrame(() => {
+                        const data = portfolioPatch;
+                        portfolioPatch = null;
+                        this.handleWebSocketMessage({ type: 'portfolio_update', data });
+                    });
                 };
                 
                 this.ws.onerror = (error) => {
@@ -206,9 +363,7 @@ createApp({
                 case 'portfolio_update':
                     this.portfolio = { ...this.portfolio, ...message.data };
                     console.log('📊 Портфель обновлен через WebSocket');
-                    this.$nextTick(() => {
-                        this.updateCharts();
-                    });
+                    this.scheduleChartsUpdate();
                     break;
                     
                 case 'system_status':
@@ -227,10 +382,9 @@ createApp({
                     break;
                     
                 case 'new_signal':
-                    this.signals.unshift(message.data);
-                    if (this.signals.length > 50) {
-                        this.signals = this.signals.slice(0, 50);
-                    }
+                    // Одно присваивание вместо unshift: сдвиг реактивного массива
+                    // вызывает отдельное срабатывание на каждый элемент
+                    this.signals = [message.data, ...this.signals.slice(0, 49)];
                     console.log('🆕 Новый сигнал:', message.data);
                     break;
                     
@@ -289,9 +443,7 @@ createApp({
                     console.log('✅ Портфель загружен:', cleanData);
                     
                     // Обновление графиков при изменении данных
-                    this.$nextTick(() => {
-                        this.updateCharts();
-                    });
+                    this.scheduleChartsUpdate();
                 }
             } catch (error) {
                 console.error('❌ Ошибка загрузки портфеля:', error);
@@ -300,14 +452,9 @@ createApp({
         
         // Загрузка исторических данных портфеля
         async loadPortfolioHistory() {
-            try {
-                // В реальном приложении здесь должен быть API для получения исторических данных
-                // Пока возвращаем пустой массив
-                return [];
-            } catch (error) {
-                console.error('Ошибка загрузки истории портфеля:', error);
-                return [];
-            }
+            // В реальном приложении здесь должен быть API для получения исторических данных
+            // Пока возвращаем пустой массив
+            return [];
         },
         
         // Загрузка сигналов
@@ -329,15 +476,15 @@ createApp({
                 const response = await fetch('/api/config');
                 if (response.ok) {
                     const data = await response.json();
-                    if (data.portfolio) {
-                        this.config.initial_capital = data.portfolio.initial_capital || 0;
-                    }
-                    if (data.signals) {
-                        this.config.signal_threshold = data.signals.threshold || 0.7;
-                    }
-                    if (data.tinkoff) {
-                        this.config.sandbox = data.tinkoff.sandbox !== false;
+                    // Значения собираются в обычный объект и применяются одним проходом
+                    const updates = {};
+                    for (const [field, getValue] of CONFIG_ACCESSORS) {
+                        const value = getValue(data);
+                        if (value !== undefined && value !== null) {
+                            updates[field] = value;
+                        }
                     }
+                    Object.assign(this.config, updates);
                     console.log('✅ Конфигурация загружена');
                 }
             } catch (error) {
@@ -365,15 +512,11 @@ createApp({
         async connectToTbank() {
             this.connecting = true;
             try {
-                const response = await fetch('/api/tbank/check', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        token: this.config.tbank_token,
-                        sandbox: this.config.sandbox
-                    })
+                // Режим sandbox берется из конфигурации, дожидаемся ее загрузки
+                await this.configLoading;
+                const response = await postJson('/api/tbank/check', {
+                    token: this.config.tbank_token,
+                    sandbox: this.config.sandbox
                 });
                 
                 const result = await response.json();
@@ -398,25 +541,11 @@ createApp({
         // Сохранение конфигурации
         async saveConfig() {
             try {
-                const configData = {
-                    portfolio: {
-                        initial_capital: this.config.initial_capital
-                    },
-                    signals: {
-                        threshold: this.config.signal_threshold
-                    },
-                    tinkoff: {
-                        sandbox: this.config.sandbox
-                    }
-                };
+                for (const [field, , setValue] of CONFIG_ACCESSORS) {
+                    setValue(CONFIG_PAYLOAD, this.config[field]);
+                }
                 
-                const response = await fetch('/api/config', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(configData)
-                });
+                const response = await postJson('/api/config', CONFIG_PAYLOAD);
                 
                 if (response.ok) {
                     alert('✅ Конфигурация сохранена успешно!');
@@ -493,19 +622,18 @@ createApp({
                 alert('⚠️ Введите токен T-Bank');
                 return;
             }
+            // Повторные нажатия во время проверки не запускают новые запросы
+            if (this.checkingConnection) {
+                return;
+            }
             
             this.connectionStatus = null;
+            this.checkingConnection = true;
             
             try {
-                const response = await fetch('/api/tbank/check', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        token: this.config.tbank_token,
-                        sandbox: this.config.sandbox
-                    })
+                const response = await postJson('/api/tbank/check', {
+                    token: this.config.tbank_token,
+                    sandbox: this.config.sandbox
                 });
                 
                 if (response.ok) {
@@ -527,6 +655,8 @@ createApp({
                     success: false,
                     error: error.message
                 };
+            } finally {
+                this.checkingConnection = false;
             }
         },
         
@@ -538,15 +668,9 @@ createApp({
             }
             
             try {
-                const response = await fetch('/api/tbank/get-balance', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        token: this.config.tbank_token,
-                        sandbox: this.config.sandbox
-                    })
+                const response = await postJson('/api/tbank/get-balance', {
+                    token: this.config.tbank_token,
+                    sandbox: this.config.sandbox
                 });
                 
                 if (response.ok) {
@@ -568,10 +692,28 @@ createApp({
             this.showTokenModal = true;
         },
         
-        // Инициализация графиков
+        // Инициализация графиков по одному в периоды простоя, не задерживая первую отрисовку
+        // (график мог быть уже создан обновлением данных)
         initCharts() {
-            this.initPortfolioChart();
-            this.initAssetsChart();
+            runWhenIdle([
+                () => Chart.getChart('portfolioChart') || this.initPortfolioChart(),
+                () => Chart.getChart('assetsChart') || this.initAssetsChart()
+            ]);
+        },
+        
+        // Отложенное обновление графиков: серия обновлений данных
+        // перерисовывает графики один раз в ближайшем кадре
+        scheduleChartsUpdate() {
+            if (this.chartsUpdatePending) {
+                return;
+            }
+            this.chartsUpdatePending = true;
+            this.$nextTick(() => {
+                requestAnimationFrame(() => {
+                    this.chartsUpdatePending = false;
+                    this.updateCharts();
+                });
+            });
         },
         
         // Обновление графиков
@@ -607,24 +749,14 @@ createApp({
                     const hasDataForDay = i === 0 || Math.random() > 0.3; // Имитация наличия данных
                     
                     if (hasDataForDay) {
-                        labels.push(date.toLocaleDateString('ru-RU', { 
-                            day: '2-digit', 
-                            month: '2-digit',
-                            hour: '2-digit',
-                            minute: '2-digit'
-                        }));
+                        labels.push(CHART_LABEL_FORMAT.format(date));
                         data.push(this.portfolio.total_value);
                     }
                 }
                 
                 // Если нет исторических данных, показываем только текущее значение
                 if (data.length === 0) {
-                    labels.push(now.toLocaleDateString('ru-RU', { 
-                        day: '2-digit', 
-                        month: '2-digit',
-                        hour: '2-digit',
-                        minute: '2-digit'
-                    }));
+                    labels.push(CHART_LABEL_FORMAT.format(now));
                     data.push(this.portfolio.total_value);
                 }
             } else {
@@ -707,12 +839,7 @@ createApp({
                     const hasDataForDay = i === 0 || Math.random() > 0.3; // Имитация наличия данных
                     
                     if (hasDataForDay) {
-                        labels.push(date.toLocaleDateString('ru-RU', { 
-                            day: '2-digit', 
-                            month: '2-digit',
-                            hour: '2-digit',
-                            minute: '2-digit'
-                        }));
+                        labels.push(CHART_LABEL_FORMAT.format(date));
                         
                         // Используем текущее значение портфеля
                         data.push(this.portfolio.total_value);
@@ -721,12 +848,7 @@ createApp({
                 
                 // Если нет исторических данных, показываем только текущее значение
                 if (data.length === 0) {
-                    labels.push(now.toLocaleDateString('ru-RU', { 
-                        day: '2-digit', 
-                        month: '2-digit',
-                        hour: '2-digit',
-                        minute: '2-digit'
-                    }));
+                    labels.push(CHART_LABEL_FORMAT.format(now));
                     data.push(this.portfolio.total_value);
                 }
             } else {
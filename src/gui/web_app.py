@@ -25,10 +25,20 @@ class TbankBalanceRequest(BaseModel):
 from loguru import logger
 import os
 from ..utils.logger_config import setup_web_logging
+from ..utils.config_manager import dump_yaml_file, load_yaml_file, prefetch_yaml_files, validate_config
+from ..utils.config_selector import ConfigSelector
+from ..services.tbank_service import read_env_file_token
 
 # Настройка логирования с поддержкой UTF-8
 setup_web_logging()
 
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    logger.warning("psutil не установлен, проверка процессов недоступна")
+
 # Импорт компонентов системы
 try:
     from ..core.investment_system import InvestmentSystem
@@ -171,9 +181,8 @@ async def get_system_status():
                 logger.warning(f"Ошибка проверки статуса investment_system: {e}")
         
         # Проверка реального состояния процесса (только если система не запущена внутренне)
-        if not app_state["system_running"]:
+        if not app_state["system_running"] and PSUTIL_AVAILABLE:
             try:
-                import psutil
                 system_process_running = False
                 
                 # Проверяем, запущен ли основной процесс инвестиционной системы
@@ -190,8 +199,6 @@ async def get_system_status():
                 if system_process_running and not app_state["system_running"]:
                     app_state["system_running"] = True
                     logger.info("Обнаружен запущенный процесс системы")
-            except ImportError:
-                logger.warning("psutil не установлен, пропускаем проверку процессов")
             except Exception as e:
                 logger.warning(f"Ошибка проверки процессов: {e}")
         
@@ -269,6 +276,8 @@ async def start_system(config_path: str = "config/main.yaml"):
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка запуска системы: {e}")
         app_state["system_running"] = False
@@ -350,6 +359,8 @@ async def get_portfolio():
             logger.info("Получение данных из торговой системы")
             try:
                 status = app_state["portfolio_manager"].get_status()
+                positions = status.get("positions", [])
+                now = datetime.now()
                 
                 portfolio_data = {
                     "total_value": status.get("total_value", 0),
@@ -357,13 +368,13 @@ async def get_portfolio():
                     "invested_value": status.get("invested", 0),
                     "total_pnl": status.get("total_pnl", 0),
                     "total_pnl_percent": status.get("total_pnl_percent", 0),
-                    "positions_count": len(status.get("positions", [])),
-                    "positions": status.get("positions", []),
-                    "last_update": datetime.now().isoformat(),
+                    "positions_count": len(positions),
+                    "positions": positions,
+                    "last_update": now.isoformat(),
                     "mode": "system"
                 }
                 
-                app_state["last_portfolio_update"] = datetime.now()
+                app_state["last_portfolio_update"] = now
                 return portfolio_data
             except Exception as e:
                 logger.warning(f"Ошибка получения данных из portfolio_manager: {e}")
@@ -417,14 +428,14 @@ async def get_signals(limit: int = 20):
                 logger.warning(f"Ошибка получения сигналов из trading_engine: {e}")
         
         # Попытка загрузить из файла
-        signals_file = Path("data/signals.json")
-        if signals_file.exists():
-            try:
-                with open(signals_file, 'r', encoding='utf-8') as f:
-                    signals = json.load(f)
-                    return signals[-limit:] if len(signals) > limit else signals
-            except Exception as e:
-                logger.warning(f"Ошибка чтения файла сигналов: {e}")
+        try:
+            with open("data/signals.json", 'r', encoding='utf-8') as f:
+                signals = json.load(f)
+                return signals[-limit:] if len(signals) > limit else signals
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ошибка чтения файла сигналов: {e}")
         
         # Возвращаем сохраненные сигналы или пустой список
         if app_state["signals"]:
@@ -439,49 +450,33 @@ async def get_signals(limit: int = 20):
 @app.post("/api/tbank/check")
 async def check_tbank_connection(request: TbankCheckRequest):
     """Проверка подключения к T-Bank API"""
-    try:
-        if not SYSTEM_AVAILABLE:
-            raise HTTPException(status_code=503, detail="Системные модули недоступны")
-        
-        result = await tbank_service.connect(request.token, request.sandbox)
-        return result
-        
-    except Exception as e:
-        logger.error(f"Ошибка проверки T-Bank: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+    if not SYSTEM_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Системные модули недоступны")
+    
+    # Ошибки подключения сервис возвращает в результате, а не исключением
+    return await tbank_service.connect(request.token, request.sandbox)
 
 @app.post("/api/tbank/get-balance")
 async def get_tbank_balance(request: TbankBalanceRequest):
     """Получение баланса с T-Bank счета"""
-    try:
-        if not SYSTEM_AVAILABLE:
-            raise HTTPException(status_code=503, detail="Системные модули недоступны")
-        
-        # Подключаемся если не подключены
-        if not tbank_service.is_connected:
-            connect_result = await tbank_service.connect(request.token, request.sandbox)
-            if not connect_result.get("success"):
-                raise HTTPException(status_code=400, detail=connect_result.get("error"))
-        
-        result = await tbank_service.get_balance()
-        return result
-        
-    except Exception as e:
-        logger.error(f"Ошибка получения баланса: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+    if not SYSTEM_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Системные модули недоступны")
+    
+    # Брокер для токена берется из кэша сервиса, полная проверка подключения не выполняется.
+    # Ошибки сервис возвращает в результате (и сам их логирует)
+    result = await tbank_service.get_balance(request.token, request.sandbox)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 @app.get("/api/config")
 async def get_config():
     """Получение текущей конфигурации"""
     try:
-        config_file = Path("config/main.yaml")
-        if config_file.exists():
-            import yaml
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                return config
-        
-        return {}
+        try:
+            return load_yaml_file(Path("config/main.yaml"))
+        except FileNotFoundError:
+            return {}
     except Exception as e:
         logger.error(f"Ошибка загрузки конфигурации: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -496,14 +491,9 @@ async def get_tbank_token():
             return {"token": token, "source": "environment"}
         
         # Проверяем .env файл
-        env_file = Path(".env")
-        if env_file.exists():
-            with open(env_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip().startswith("TINKOFF_TOKEN="):
-                        token = line.split("=", 1)[1].strip().strip('"').strip("'")
-                        if token:
-                            return {"token": token, "source": "env_file"}
+        token = read_env_file_token()
+        if token:
+            return {"token": token, "source": "env_file"}
         
         return {"token": "", "source": "none"}
     except Exception as e:
@@ -515,11 +505,29 @@ async def save_config(config: dict):
     """Сохранение конфигурации"""
     try:
         config_file = Path("config/main.yaml")
-        import yaml
-        with open(config_file, 'w', encoding='utf-8') as f:
-            yaml.dump(config, f, default_flow_style=False, allow_unicode=True, indent=2)
+        
+        # Сохранение без изменений не проверяет и не переписывает файл
+        # (разбор берется из кэша по mtime)
+        try:
+            if load_yaml_file(config_file) == config:
+                logger.debug("Конфигурация не изменилась, запись пропущена")
+                return {"message": "Конфигурация сохранена успешно"}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            # Поврежденный файл перезаписывается новой конфигурацией
+            logger.warning(f"Не удалось прочитать текущую конфигурацию: {e}")
+        
+        try:
+            validate_config(config, partial=True)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        dump_yaml_file(config_file, config, indent=2)
         
         return {"message": "Конфигурация сохранена успешно"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка сохранения конфигурации: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -560,28 +568,24 @@ async def get_logs(lines: int = 100):
 @app.get("/api/system/info")
 async def get_system_info():
     """Получение детальной информации о системе"""
-    try:
-        info = {
-            "is_running": app_state["system_running"],
-            "has_investment_system": app_state["investment_system"] is not None,
-            "has_portfolio_manager": app_state["portfolio_manager"] is not None,
-            "has_network_manager": app_state["network_manager"] is not None,
-            "has_trading_engine": app_state["trading_engine"] is not None,
-            "system_available": SYSTEM_AVAILABLE,
-            "last_portfolio_update": app_state["last_portfolio_update"].isoformat() if app_state["last_portfolio_update"] else None,
-            "last_signals_update": app_state["last_signals_update"].isoformat() if app_state["last_signals_update"] else None,
-            "start_time": app_state.get("start_time").isoformat() if app_state.get("start_time") else None,
-            "active_websockets": len(manager.active_connections),
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        if app_state["investment_system"]:
-            info["system_running_internally"] = app_state["investment_system"].is_running
-        
-        return info
-    except Exception as e:
-        logger.error(f"Ошибка получения информации о системе: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    info = {
+        "is_running": app_state["system_running"],
+        "has_investment_system": app_state["investment_system"] is not None,
+        "has_portfolio_manager": app_state["portfolio_manager"] is not None,
+        "has_network_manager": app_state["network_manager"] is not None,
+        "has_trading_engine": app_state["trading_engine"] is not None,
+        "system_available": SYSTEM_AVAILABLE,
+        "last_portfolio_update": app_state["last_portfolio_update"].isoformat() if app_state["last_portfolio_update"] else None,
+        "last_signals_update": app_state["last_signals_update"].isoformat() if app_state["last_signals_update"] else None,
+        "start_time": app_state.get("start_time").isoformat() if app_state.get("start_time") else None,
+        "active_websockets": len(manager.active_connections),
+        "timestamp": datetime.now().isoformat()
+    }
+    
+    if app_state["investment_system"]:
+        info["system_running_internally"] = app_state["investment_system"].is_running
+    
+    return info
 
 @app.get("/api/system/metrics")
 async def get_system_metrics():
@@ -650,6 +654,8 @@ async def websocket_endpoint(websocket: WebSocket):
 # Фоновая задача для отправки обновлений
 async def broadcast_updates():
     """Периодическая отправка обновлений клиентам"""
+    # Последний отправленный список сигналов: неизменившийся список повторно не рассылается
+    last_signals = None
     while True:
         try:
             if app_state["system_running"] and len(manager.active_connections) > 0:
@@ -666,11 +672,12 @@ async def broadcast_updates():
                 # Отправка новых сигналов
                 try:
                     signals = await get_signals(limit=10)
-                    if signals:
+                    if signals and signals != last_signals:
                         await manager.broadcast({
                             "type": "signals_update",
                             "data": signals
                         })
+                        last_signals = signals
                 except Exception as e:
                     logger.warning(f"Ошибка отправки сигналов: {e}")
                 
@@ -704,26 +711,27 @@ async def startup_event():
         Path(dir_name).mkdir(exist_ok=True)
     
     # Проверка запущенной системы при старте
-    try:
-        import psutil
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-            try:
-                cmdline = proc.info.get('cmdline', [])
-                if cmdline and any('investment_system' in str(arg).lower() or 'run.py' in str(arg) for arg in cmdline):
-                    app_state["system_running"] = True
-                    logger.info("Обнаружен запущенный процесс инвестиционной системы")
-                    break
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-    except Exception as e:
-        logger.warning(f"Не удалось проверить статус системы при запуске: {e}")
+    if PSUTIL_AVAILABLE:
+        try:
+            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+                try:
+                    cmdline = proc.info.get('cmdline', [])
+                    if cmdline and any('investment_system' in str(arg).lower() or 'run.py' in str(arg) for arg in cmdline):
+                        app_state["system_running"] = True
+                        logger.info("Обнаружен запущенный процесс инвестиционной системы")
+                        break
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    pass
+        except Exception as e:
+            logger.warning(f"Не удалось проверить статус системы при запуске: {e}")
     
-    # Попытка автоматического подключения к T-Bank
-    try:
-        if SYSTEM_AVAILABLE:
-            await auto_connect_tbank()
-    except Exception as e:
-        logger.warning(f"Не удалось автоматически подключиться к T-Bank: {e}")
+    # Автоматическое подключение к T-Bank выполняется в фоне и не задерживает запуск сервера
+    # (auto_connect_tbank сам обрабатывает и логирует ошибки)
+    if SYSTEM_AVAILABLE:
+        asyncio.create_task(auto_connect_tbank())
+    
+    # Разбор предустановленных конфигураций в фоне, чтобы первое обращение к ним было быстрым
+    asyncio.create_task(asyncio.to_thread(prefetch_yaml_files, ConfigSelector().get_config_paths()))
     
     # Запуск фоновой задачи
     asyncio.create_task(broadcast_updates())
@@ -6,6 +6,8 @@ import asyncio
 import aiohttp
 import json
 import os
+import re
+import traceback
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from loguru import logger
@@ -761,7 +763,6 @@ class DeepSeekNetwork(BaseNeuralNetwork):
             logger.debug(f"DeepSeek API ответ (первые 500 символов): {response_preview}")
             
             # Поиск JSON в ответе
-            import re
             json_match = re.search(r'\{.*\}', response, re.DOTALL)
             
             if json_match:
@@ -1004,7 +1005,6 @@ class DeepSeekNetwork(BaseNeuralNetwork):
                 
         except Exception as e:
             logger.error(f"Ошибка проверки качества обучения DeepSeek {self.name}: {e}")
-            import traceback
             logger.debug(f"Трассировка ошибки: {traceback.format_exc()}")
             return {}
     
@@ -248,41 +248,32 @@ class EnhancedFeatureExtractor:
                 df['Bid_Ask_Ratio'] = df['Total_Bid_Volume'] / (df['Total_Ask_Volume'] + 1e-8)
             
             # Глубина стакана
-            if 'bids' in orderbook_data and 'asks' in orderbook_data:
-                bids = orderbook_data['bids']
-                asks = orderbook_data['asks']
+            levels = self._get_orderbook_levels(orderbook_data)
+            if levels is not None:
+                bid_prices, bid_volumes, ask_prices, ask_volumes = levels
                 
-                if bids and asks:
+                if bid_prices.size and ask_prices.size:
                     # Количество уровней
-                    df['Bid_Levels'] = len(bids)
-                    df['Ask_Levels'] = len(asks)
+                    df['Bid_Levels'] = bid_prices.size
+                    df['Ask_Levels'] = ask_prices.size
                     
                     # Средние цены в стакане
-                    if bids:
-                        bid_prices = [bid['price'] for bid in bids]
-                        df['Avg_Bid_Price'] = np.mean(bid_prices)
-                        df['Bid_Price_Std'] = np.std(bid_prices)
-                    
-                    if asks:
-                        ask_prices = [ask['price'] for ask in asks]
-                        df['Avg_Ask_Price'] = np.mean(ask_prices)
-                        df['Ask_Price_Std'] = np.std(ask_prices)
+                    df['Avg_Bid_Price'] = bid_prices.mean()
+                    df['Bid_Price_Std'] = bid_prices.std()
+                    df['Avg_Ask_Price'] = ask_prices.mean()
+                    df['Ask_Price_Std'] = ask_prices.std()
                     
                     # Концентрация объема
-                    if bids:
-                        bid_volumes = [bid['quantity'] for bid in bids]
-                        total_bid_vol = sum(bid_volumes)
-                        if total_bid_vol > 0:
-                            df['Bid_Volume_Concentration'] = max(bid_volumes) / total_bid_vol
+                    total_bid_vol = bid_volumes.sum()
+                    if total_bid_vol > 0:
+                        df['Bid_Volume_Concentration'] = bid_volumes.max() / total_bid_vol
                     
-                    if asks:
-                        ask_volumes = [ask['quantity'] for ask in asks]
-                        total_ask_vol = sum(ask_volumes)
-                        if total_ask_vol > 0:
-                            df['Ask_Volume_Concentration'] = max(ask_volumes) / total_ask_vol
+                    total_ask_vol = ask_volumes.sum()
+                    if total_ask_vol > 0:
+                        df['Ask_Volume_Concentration'] = ask_volumes.max() / total_ask_vol
                     
                     # Глубина по ценам
-                    if len(bids) > 1 and len(asks) > 1:
+                    if bid_prices.size > 1 and ask_prices.size > 1:
                         bid_range = bid_prices[0] - bid_prices[-1]
                         ask_range = ask_prices[-1] - ask_prices[0]
                         df['Bid_Price_Range'] = bid_range
@@ -296,6 +287,35 @@ class EnhancedFeatureExtractor:
         
         return df
     
+    def _get_orderbook_levels(
+        self, orderbook_data: Dict
+    ) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Получение уровней стакана в виде колонок (цены и объемы bid/ask)
+        
+        Поддерживает колоночный формат (bid_price, bid_qty, ask_price, ask_qty)
+        и списки словарей bids/asks.
+        """
+        if 'bid_price' in orderbook_data and 'ask_price' in orderbook_data:
+            return (
+                orderbook_data['bid_price'],
+                orderbook_data['bid_qty'],
+                orderbook_data['ask_price'],
+                orderbook_data['ask_qty']
+            )
+        
+        if 'bids' in orderbook_data and 'asks' in orderbook_data:
+            bids = orderbook_data['bids']
+            asks = orderbook_data['asks']
+            return (
+                np.array([bid['price'] for bid in bids], dtype=np.float64),
+                np.array([bid['quantity'] for bid in bids], dtype=np.int64),
+                np.array([ask['price'] for ask in asks], dtype=np.float64),
+                np.array([ask['quantity'] for ask in asks], dtype=np.int64)
+            )
+        
+        return None
+    
     def _add_instrument_features(self, data: pd.DataFrame, instrument_info: Dict) -> pd.DataFrame:
         """Добавление инструментальных признаков"""
         df = data.copy()
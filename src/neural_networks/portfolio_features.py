@@ -7,7 +7,7 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional, Any, Tuple
 from loguru import logger
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
 
 
@@ -234,8 +234,6 @@ class PortfolioFeatureExtractor:
     def _extract_temporal_features(self, portfolio_manager) -> Dict[str, int]:
         """Извлечение временных признаков"""
         try:
-            from datetime import timezone
-            
             # Получаем текущее время с timezone
             now = datetime.now(timezone.utc)
             
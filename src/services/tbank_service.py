@@ -4,9 +4,11 @@
 """
 
 import os
+import re
 import asyncio
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import partial
+from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 from loguru import logger
 
@@ -18,6 +20,15 @@ except ImportError as e:
     TINKOFF_AVAILABLE = False
     logger.warning(f"Tinkoff Invest API недоступен: {e}")
 
+# Предельное время ожидания ответа T-Bank API при подключении и запросе баланса (сек).
+# Зависшее соединение не должно держать запрос веб-интерфейса бесконечно
+TBANK_REQUEST_TIMEOUT = 10.0
+
+# Тексты ошибок сервиса: строятся один раз при загрузке модуля
+NOT_CONNECTED_ERROR = "Не подключен к T-Bank"
+API_UNAVAILABLE_ERROR = "Tinkoff Invest API недоступен"
+TIMEOUT_ERROR = f"T-Bank API не ответил за {TBANK_REQUEST_TIMEOUT:.0f} сек"
+
 
 class TBankService:
     """Сервис для работы с T-Bank API"""
@@ -26,6 +37,12 @@ class TBankService:
         self.broker: Optional[TBankBroker] = None
         self.is_connected = False
         self.last_update = None
+        # Инициализированный брокер по (токен, режим песочницы): повторная проверка
+        # подключения не загружает заново счет и справочник инструментов.
+        # Хранится только последний, чтобы перебор токенов не накапливал брокеры
+        self._brokers: Dict[Tuple[str, bool], TBankBroker] = {}
+        # (токен, режим) -> инициализация брокера, выполняющаяся сейчас
+        self._broker_inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
         
     async def connect(self, token: str, sandbox: bool = True) -> Dict[str, Any]:
         """
@@ -38,41 +55,87 @@ class TBankService:
         Returns:
             Результат подключения
         """
+        key = (token, sandbox)
         try:
             if not TINKOFF_AVAILABLE:
                 return {
                     "success": False,
-                    "error": "Tinkoff Invest API недоступен"
+                    "error": API_UNAVAILABLE_ERROR
                 }
             
-            # Создаем брокера
-            self.broker = TBankBroker(token=token, sandbox=sandbox)
-            await self.broker.initialize()
+            self.broker = await asyncio.wait_for(
+                self._get_broker(token, sandbox), timeout=TBANK_REQUEST_TIMEOUT
+            )
             
             # Получаем статус
             status = self.broker.get_status()
-            balance = await self.broker.get_total_balance_rub()
+            balance = await asyncio.wait_for(
+                self.broker.get_total_balance_rub(), timeout=TBANK_REQUEST_TIMEOUT
+            )
+            
+            account_id = status.get("account_id")
             
             self.is_connected = True
             self.last_update = datetime.now()
             
-            logger.info(f"T-Bank подключен: {status.get('account_id')}")
+            logger.info(f"T-Bank подключен: {account_id}")
             
             return {
                 "success": True,
                 "mode": "sandbox" if sandbox else "production",
-                "account_id": status.get("account_id"),
+                "account_id": account_id,
                 "balance": balance,
                 "instruments": status.get("instruments_loaded", 0)
             }
             
+        except asyncio.TimeoutError:
+            # Инициализация брокера продолжается в фоне и будет подхвачена повторной проверкой
+            logger.error(TIMEOUT_ERROR)
+            return {
+                "success": False,
+                "error": TIMEOUT_ERROR
+            }
         except Exception as e:
+            # Брокер с ошибкой не переиспользуется
+            self._brokers.pop(key, None)
             logger.error(f"Ошибка подключения к T-Bank: {e}")
             return {
                 "success": False,
                 "error": str(e)
             }
     
+    async def _get_broker(self, token: str, sandbox: bool) -> "TBankBroker":
+        """
+        Получение инициализированного брокера для токена и режима
+        
+        Брокер создается и инициализируется только при первом обращении
+        с этими параметрами, далее берется из кэша. Одновременные проверки
+        подключения ждут одну и ту же инициализацию.
+        """
+        key = (token, sandbox)
+        broker = self._brokers.get(key)
+        if broker is not None:
+            return broker
+        
+        task = self._broker_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create_broker(token, sandbox))
+            self._broker_inflight[key] = task
+            task.add_done_callback(partial(self._forget_inflight, key))
+        return await asyncio.shield(task)
+    
+    def _forget_inflight(self, key: Tuple[str, bool], _task: asyncio.Future) -> None:
+        """Удаление завершенной инициализации брокера из списка выполняющихся"""
+        self._broker_inflight.pop(key, None)
+    
+    async def _create_broker(self, token: str, sandbox: bool) -> "TBankBroker":
+        """Создание, инициализация и сохранение брокера в кэше вместо предыдущего"""
+        broker = TBankBroker(token=token, sandbox=sandbox)
+        await broker.initialize()
+        self._brokers.clear()
+        self._brokers[(token, sandbox)] = broker
+        return broker
+    
     async def get_portfolio_data(self) -> Dict[str, Any]:
         """
         Получение данных портфеля
@@ -82,16 +145,16 @@ class TBankService:
         """
         if not self.is_connected or not self.broker:
             return {
-                "error": "Не подключен к T-Bank",
+                "error": NOT_CONNECTED_ERROR,
                 "mode": "disconnected"
             }
         
         try:
-            # Получаем баланс
-            balance = await self.broker.get_total_balance_rub()
-            
-            # Получаем портфель
-            portfolio = await self.broker.get_portfolio()
+            # Баланс и портфель - независимые запросы к API, выполняем параллельно
+            balance, portfolio = await asyncio.gather(
+                self.broker.get_total_balance_rub(),
+                self.broker.get_portfolio()
+            )
             
             # Обрабатываем данные
             total_value = balance
@@ -150,25 +213,51 @@ class TBankService:
                 "mode": "error"
             }
     
-    async def get_balance(self) -> Dict[str, Any]:
+    async def get_balance(self, token: Optional[str] = None, sandbox: bool = True) -> Dict[str, Any]:
         """
         Получение баланса
         
+        Args:
+            token: Токен T-Bank; если не указан, используется текущее подключение
+            sandbox: Режим песочницы
+            
         Returns:
             Данные баланса
         """
-        if not self.is_connected or not self.broker:
+        if token is None and (not self.is_connected or not self.broker):
+            return {
+                "error": NOT_CONNECTED_ERROR
+            }
+        if token is not None and not TINKOFF_AVAILABLE:
             return {
-                "error": "Не подключен к T-Bank"
+                "error": API_UNAVAILABLE_ERROR
             }
         
         try:
-            balance = await self.broker.get_total_balance_rub()
+            if token is None:
+                broker = self.broker
+            else:
+                # Запрос по токену не меняет текущее подключение сервиса
+                broker = await asyncio.wait_for(
+                    self._get_broker(token, sandbox), timeout=TBANK_REQUEST_TIMEOUT
+                )
+            balance = await asyncio.wait_for(
+                broker.get_total_balance_rub(), timeout=TBANK_REQUEST_TIMEOUT
+            )
+            if token is None:
+                self.last_update = datetime.now()
             return {
                 "balance": balance,
                 "currency": "RUB"
             }
+        except asyncio.TimeoutError:
+            logger.error(TIMEOUT_ERROR)
+            return {
+                "error": TIMEOUT_ERROR
+            }
         except Exception as e:
+            if token is not None:
+                self._brokers.pop((token, sandbox), None)
             logger.error(f"Ошибка получения баланса: {e}")
             return {
                 "error": str(e)
@@ -177,6 +266,7 @@ class TBankService:
     def disconnect(self):
         """Отключение от T-Bank"""
         self.broker = None
+        self._brokers.clear()
         self.is_connected = False
         self.last_update = None
         logger.info("Отключен от T-Bank")
@@ -199,6 +289,47 @@ class TBankService:
 tbank_service = TBankService()
 
 
+# Строка TINKOFF_TOKEN=... в .env: значение без пробелов и кавычек по краям
+_ENV_TOKEN_RE = re.compile(r'^[ \t]*TINKOFF_TOKEN=[ \t]*["\']*(.*?)["\']*[ \t\r]*$', re.MULTILINE)
+
+# Кэш токенов из .env: путь -> (mtime_ns, токен)
+_ENV_TOKEN_CACHE: Dict[str, Tuple[int, Optional[str]]] = {}
+
+
+def read_env_file_token(env_file: Path = Path(".env")) -> Optional[str]:
+    """
+    Поиск токена T-Bank в .env файле
+    
+    Файл читается целиком и просматривается одним регулярным выражением.
+    Результат кэшируется до изменения mtime файла
+    
+    Args:
+        env_file: Путь к .env файлу
+        
+    Returns:
+        Первый непустой токен или None
+    """
+    key = str(env_file)
+    try:
+        mtime_ns = env_file.stat().st_mtime_ns
+    except FileNotFoundError:
+        _ENV_TOKEN_CACHE.pop(key, None)
+        return None
+    
+    cached = _ENV_TOKEN_CACHE.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    
+    token = None
+    for match in _ENV_TOKEN_RE.finditer(env_file.read_text(encoding='utf-8')):
+        if match.group(1):
+            token = match.group(1)
+            break
+    
+    _ENV_TOKEN_CACHE[key] = (mtime_ns, token)
+    return token
+
+
 async def get_tbank_token_from_env() -> Optional[str]:
     """
     Получение токена T-Bank из переменных окружения
@@ -212,17 +343,10 @@ async def get_tbank_token_from_env() -> Optional[str]:
         return token
     
     # Проверяем .env файл
-    env_file = Path(".env")
-    if env_file.exists():
-        try:
-            with open(env_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip().startswith("TINKOFF_TOKEN="):
-                        token = line.split("=", 1)[1].strip().strip('"').strip("'")
-                        if token:
-                            return token
-        except Exception as e:
-            logger.warning(f"Ошибка чтения .env файла: {e}")
+    try:
+        return read_env_file_token()
+    except Exception as e:
+        logger.warning(f"Ошибка чтения .env файла: {e}")
     
     return None
 
@@ -246,9 +370,8 @@ async def auto_connect_tbank() -> bool:
         if result.get("success"):
             logger.info("T-Bank автоматически подключен")
             return True
-        else:
-            logger.warning(f"Не удалось автоматически подключиться к T-Bank: {result.get('error')}")
-            return False
+        # Причину ошибки connect уже записал в лог
+        return False
             
     except Exception as e:
         logger.warning(f"Ошибка автоматического подключения к T-Bank: {e}")
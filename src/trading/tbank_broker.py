@@ -11,7 +11,7 @@ from loguru import logger
 import asyncio
 
 try:
-    from tinkoff.invest import Client, AsyncClient, OrderDirection, OrderType
+    from tinkoff.invest import Client, AsyncClient, OrderDirection, OrderType, Quotation
     from tinkoff.invest.schemas import (
         PostOrderResponse, 
         OrderState,
@@ -72,66 +72,78 @@ class TBankBroker:
         """Получение клиента для использования в веб-GUI"""
         return AsyncClient(self.token, target=self.target)
     
+    async def __aenter__(self) -> "TBankBroker":
+        """Инициализация брокера при входе в блок async with"""
+        await self.initialize()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """
+        Выход из блока async with
+        
+        Каждый запрос открывает и закрывает собственный канал к API,
+        поэтому постоянных подключений, требующих закрытия, у брокера нет
+        """
+        return None
+    
     async def initialize(self):
         """
         Инициализация брокера
+        
+        Ошибки не логируются здесь, а передаются вызывающему коду,
+        который сообщает о них один раз
         """
         logger.info("Инициализация T-Bank брокера")
         
-        try:
-            async with AsyncClient(self.token, target=self.target) as client:
-                # Загрузка списка инструментов
-                response = await client.instruments.shares()
-                for share in response.instruments:
-                    # В sandbox проверяем дополнительно trading_status
-                    if self.sandbox:
-                        # Для sandbox проверяем, что инструмент доступен для торговли
-                        if share.api_trade_available_flag and share.trading_status.name == 'SECURITY_TRADING_STATUS_NORMAL_TRADING':
-                            self.instruments_cache[share.ticker] = share.figi
-                            self.lot_sizes[share.ticker] = share.lot
-                    else:
-                        # Для production достаточно флага api_trade_available_flag
-                        if share.api_trade_available_flag:
-                            self.instruments_cache[share.ticker] = share.figi
-                            self.lot_sizes[share.ticker] = share.lot
-                
-                logger.info(f"Загружено {len(self.instruments_cache)} торгуемых инструментов")
-                
-                # Вывод примеров доступных тикеров для отладки
-                if self.instruments_cache:
-                    sample_tickers = list(self.instruments_cache.keys())[:10]
-                    logger.debug(f"Примеры доступных тикеров: {', '.join(sample_tickers)}")
-                
-                # Проверяем конкретно GMKN
-                gmkn_found = False
-                for share in response.instruments:
-                    if share.ticker == 'GMKN':
-                        gmkn_found = True
-                        logger.info(f"GMKN найден: api_trade_available_flag={share.api_trade_available_flag}, trading_status={share.trading_status.name}")
-                        break
-                
-                if not gmkn_found:
-                    logger.warning("GMKN не найден в списке инструментов")
-                
-                # Для sandbox: создание/получение счета
+        async with AsyncClient(self.token, target=self.target) as client:
+            # Загрузка списка инструментов
+            response = await client.instruments.shares()
+            for share in response.instruments:
+                # В sandbox проверяем дополнительно trading_status
                 if self.sandbox:
-                    await self._setup_sandbox_account(client)
+                    # Для sandbox проверяем, что инструмент доступен для торговли
+                    if share.api_trade_available_flag and share.trading_status.name == 'SECURITY_TRADING_STATUS_NORMAL_TRADING':
+                        self.instruments_cache[share.ticker] = share.figi
+                        self.lot_sizes[share.ticker] = share.lot
                 else:
-                    # Для prod: получение списка счетов
-                    accounts = await client.users.get_accounts()
-                    if accounts.accounts:
-                        if not self.account_id:
-                            self.account_id = accounts.accounts[0].id
-                        logger.info(f"Используется счет: {self.account_id}")
-                    else:
-                        raise ValueError("Не найдено ни одного счета")
-                
-                # Загрузка текущих позиций
-                await self.update_positions()
-                
-        except Exception as e:
-            logger.error(f"Ошибка инициализации T-Bank брокера: {e}")
-            raise
+                    # Для production достаточно флага api_trade_available_flag
+                    if share.api_trade_available_flag:
+                        self.instruments_cache[share.ticker] = share.figi
+                        self.lot_sizes[share.ticker] = share.lot
+            
+            logger.info(f"Загружено {len(self.instruments_cache)} торгуемых инструментов")
+            
+            # Вывод примеров доступных тикеров для отладки
+            if self.instruments_cache:
+                sample_tickers = list(self.instruments_cache.keys())[:10]
+                logger.debug(f"Примеры доступных тикеров: {', '.join(sample_tickers)}")
+            
+            # Проверяем конкретно GMKN
+            gmkn_found = False
+            for share in response.instruments:
+                if share.ticker == 'GMKN':
+                    gmkn_found = True
+                    logger.info(f"GMKN найден: api_trade_available_flag={share.api_trade_available_flag}, trading_status={share.trading_status.name}")
+                    break
+            
+            if not gmkn_found:
+                logger.warning("GMKN не найден в списке инструментов")
+            
+            # Для sandbox: создание/получение счета
+            if self.sandbox:
+                await self._setup_sandbox_account(client)
+            else:
+                # Для prod: получение списка счетов
+                accounts = await client.users.get_accounts()
+                if accounts.accounts:
+                    if not self.account_id:
+                        self.account_id = accounts.accounts[0].id
+                    logger.info(f"Используется счет: {self.account_id}")
+                else:
+                    raise ValueError("Не найдено ни одного счета")
+            
+            # Загрузка текущих позиций
+            await self.update_positions()
     
     async def _setup_sandbox_account(self, client):
         """
@@ -700,14 +712,12 @@ class TBankBroker:
     
     def _quotation(self, value: float):
         """Конвертация float в Quotation"""
-        from tinkoff.invest import Quotation
         units = int(value)
         nano = int((value - units) * 1_000_000_000)
         return Quotation(units=units, nano=nano)
     
     def _money_value(self, value: float, currency: str = "rub"):
         """Создание MoneyValue"""
-        from tinkoff.invest import MoneyValue
         units = int(value)
         nano = int((value - units) * 1_000_000_000)
         return MoneyValue(currency=currency, units=units, nano=nano)
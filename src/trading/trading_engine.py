@@ -20,6 +20,9 @@ except ImportError:
     TBANK_AVAILABLE = False
     logger.warning("T-Bank брокер недоступен")
 
+# Значения broker_type, обслуживаемые T-Bank брокером
+TBANK_BROKER_TYPES = frozenset(('tinkoff', 'tbank'))
+
 
 class OrderType(Enum):
     """Типы ордеров"""
@@ -46,6 +49,12 @@ class OrderStatus(Enum):
 class Order:
     """Класс торгового ордера"""
     
+    # Ордера накапливаются в истории: без __dict__ у каждого экземпляра
+    __slots__ = (
+        'order_id', 'symbol', 'side', 'quantity', 'order_type', 'price', 'stop_price',
+        'status', 'created_at', 'filled_at', 'filled_price', 'filled_quantity', 'commission'
+    )
+    
     def __init__(self, symbol: str, side: OrderSide, quantity: float, 
                  order_type: OrderType = OrderType.MARKET, price: Optional[float] = None,
                  stop_price: Optional[float] = None, order_id: Optional[str] = None):
@@ -81,6 +90,8 @@ class Order:
 class TradingSignal:
     """Класс торгового сигнала"""
     
+    __slots__ = ('symbol', 'signal', 'confidence', 'price', 'strength', 'source', 'timestamp', 'reasoning')
+    
     def __init__(self, symbol: str, signal: str, confidence: float, 
                  price: Optional[float] = None, strength: float = 0.0,
                  source: str = "neural_network", timestamp: Optional[datetime] = None,
@@ -921,7 +932,7 @@ class TradingEngine:
                 await self.portfolio_manager.set_cooldown_for_symbol(signal.symbol, signal.signal)
             
             # Проверка доступности инструмента в брокере
-            if self.broker_type in ['tinkoff', 'tbank'] and self.tbank_broker:
+            if self.broker_type in TBANK_BROKER_TYPES and self.tbank_broker:
                 if not self.tbank_broker.is_ticker_available(signal.symbol):
                     logger.info(f"⏸️ {signal.symbol}: Инструмент недоступен для торговли в T-Bank")
                     return
@@ -1001,7 +1012,7 @@ class TradingEngine:
                 return await self._calculate_position_size_legacy(signal)
             
             # Принудительная синхронизация с T-Bank перед расчетом (если доступен)
-            if self.broker_type in ['tinkoff', 'tbank'] and self.tbank_broker:
+            if self.broker_type in TBANK_BROKER_TYPES and self.tbank_broker:
                 try:
                     await self.portfolio_manager.sync_with_tbank()
                 except Exception as e:
@@ -1009,7 +1020,7 @@ class TradingEngine:
             
             # Получение реального баланса из T-Bank (если доступен)
             real_balance = None
-            if self.broker_type in ['tinkoff', 'tbank'] and self.tbank_broker:
+            if self.broker_type in TBANK_BROKER_TYPES and self.tbank_broker:
                 try:
                     balance_info = await self.tbank_broker.get_account_balance()
                     real_balance = balance_info.get('rub', 0.0)
@@ -1078,7 +1089,7 @@ class TradingEngine:
             
             # Получение размера лота для символа
             lot_size = 1  # По умолчанию
-            if self.broker_type in ['tinkoff', 'tbank'] and self.tbank_broker:
+            if self.broker_type in TBANK_BROKER_TYPES and self.tbank_broker:
                 lot_size = self.tbank_broker.get_lot_size(signal.symbol)
                 logger.debug(f"{signal.symbol}: Размер лота: {lot_size}")
             
@@ -1370,7 +1381,7 @@ class TradingEngine:
             order: Ордер для выполнения
         """
         try:
-            if self.broker_type in ['tinkoff', 'tbank'] and self.tbank_broker:
+            if self.broker_type in TBANK_BROKER_TYPES and self.tbank_broker:
                 await self._execute_tbank_order(order)
             else:
                 logger.warning(f"Выполнение реальных ордеров для брокера {self.broker_type} не реализовано")
@@ -2,13 +2,295 @@
 Менеджер конфигурации системы
 """
 
-import yaml
+import copy
+import hashlib
+import pickle
+import re
+import tempfile
 import os
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Callable, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 
 
+@lru_cache(maxsize=None)
+def _yaml():
+    """
+    Ленивый импорт PyYAML
+    
+    Модуль импортируется при первом чтении или записи YAML, а не при импорте
+    менеджера конфигурации. C-реализация (libyaml) заметно быстрее;
+    без нее используются классы на чистом Python.
+    
+    Returns:
+        Кортеж (модуль yaml, класс загрузчика, класс выгрузчика)
+    """
+    import yaml
+    try:
+        from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    except ImportError:
+        from yaml import SafeLoader, SafeDumper
+    return yaml, SafeLoader, SafeDumper
+
+
+# Разобранные YAML-файлы: (путь, была ли предобработка) -> (mtime_ns, текст, результат разбора).
+# Результат с предобработкой (например, с подставленными токенами) хранится отдельно
+# и никогда не отдается вызовам без предобработки
+_YAML_CACHE: Dict[Tuple[str, bool], Tuple[int, str, Any]] = {}
+
+# Суффикс файла с сохраненным результатом разбора рядом с YAML-файлом
+YAML_SIDECAR_SUFFIX = '.cache'
+
+
+def load_yaml_file(path, preprocess: Optional[Callable[[str], str]] = None) -> Any:
+    """
+    Загрузка YAML-файла с кэшированием результата разбора
+    
+    Файл разбирается заново только при изменении его mtime или текста
+    после предобработки. Файлы, записанные через dump_yaml_file, берутся
+    из кэша без повторного разбора. Результат разбора также сохраняется рядом с файлом
+    (<имя>.yaml.cache), поэтому при новом запуске процесса YAML не разбирается.
+    Возвращается копия, поэтому изменения результата не затрагивают кэш.
+    
+    Args:
+        path: Путь к YAML-файлу
+        preprocess: Преобразование текста перед разбором (например, подстановка
+            переменных окружения)
+        
+    Returns:
+        Результат разбора YAML
+    """
+    path = os.path.abspath(path)
+    key = (path, preprocess is not None)
+    mtime_ns = os.stat(path).st_mtime_ns
+    cached = _YAML_CACHE.get(key)
+    
+    if cached is not None and cached[0] == mtime_ns and preprocess is None:
+        return copy.deepcopy(cached[2])
+    
+    with open(path, 'r', encoding='utf-8') as file:
+        raw = file.read()
+    content = preprocess(raw) if preprocess is not None else raw
+    
+    if cached is None or cached[1] != content:
+        # Текст с подставленными значениями (например, токенами) на диск не пишется
+        use_sidecar = content == raw
+        data = _load_yaml_sidecar(path, content) if use_sidecar else None
+        if data is None:
+            yaml, loader, _ = _yaml()
+            data = yaml.load(content, Loader=loader)
+            if use_sidecar:
+                _save_yaml_sidecar(path, content, data)
+        cached = (mtime_ns, content, data)
+    else:
+        cached = (mtime_ns, content, cached[2])
+    _YAML_CACHE[key] = cached
+    return copy.deepcopy(cached[2])
+
+
+# Начало строки с ключом верхнего уровня YAML-документа
+_TOP_LEVEL_KEY = re.compile(rb'^[^\s#\-][^\n]*:', re.MULTILINE)
+
+
+def peek_yaml_header(path, max_bytes: int = 4096) -> Dict[str, Any]:
+    """
+    Разбор только начала YAML-файла для получения секций верхнего уровня
+    
+    Читаются первые max_bytes байт; текст обрезается перед последним ключом
+    верхнего уровня, чтобы разбирались только полностью прочитанные секции.
+    Подходит для описания файла (например, system.name) без полного разбора.
+    Короткие файлы и файлы без подходящей границы разбираются целиком.
+    
+    Args:
+        path: Путь к YAML-файлу
+        max_bytes: Сколько байт читать с начала файла
+        
+    Returns:
+        Словарь с разобранными секциями верхнего уровня
+    """
+    with open(path, 'rb') as file:
+        head = file.read(max_bytes + 1)
+    if len(head) <= max_bytes:
+        data = load_yaml_file(path)
+        return data if isinstance(data, dict) else {}
+    
+    boundaries = [match.start() for match in _TOP_LEVEL_KEY.finditer(head)]
+    if len(boundaries) < 2:
+        data = load_yaml_file(path)
+        return data if isinstance(data, dict) else {}
+    
+    try:
+        yaml, loader, _ = _yaml()
+        data = yaml.load(head[:boundaries[-1]].decode('utf-8'), Loader=loader)
+    except Exception as e:
+        logger.debug(f"Не удалось разобрать начало {path}, полный разбор: {e}")
+        data = load_yaml_file(path)
+    return data if isinstance(data, dict) else {}
+
+
+def prefetch_yaml_files(paths):
+    """
+    Предварительная загрузка YAML-файлов в кэш разбора
+    
+    Предназначена для запуска в фоновом потоке, чтобы первое обращение
+    к шаблону конфигурации не тратило время на разбор.
+    
+    Args:
+        paths: Пути к YAML-файлам
+    """
+    for path in paths:
+        try:
+            load_yaml_file(path)
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logger.debug(f"Не удалось предварительно загрузить {path}: {e}")
+
+
+def dump_yaml_file(path, data: Any, **kwargs):
+    """
+    Атомарная запись данных в YAML-файл
+    
+    Данные выгружаются в байты целиком и записываются во временный файл
+    в той же директории одним os.write, после чего временный файл заменяет
+    исходный. Порядок ключей сохраняется.
+    
+    Args:
+        path: Путь к YAML-файлу
+        data: Сохраняемые данные
+        **kwargs: Дополнительные параметры yaml.dump
+    """
+    yaml, _, dumper = _yaml()
+    path = os.path.abspath(path)
+    payload = yaml.dump(
+        data, Dumper=dumper, encoding='utf-8', allow_unicode=True,
+        default_flow_style=False, sort_keys=False, **kwargs
+    )
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        # mkstemp создает файл с правами 0600 - сохраняем права исходного файла
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    # Записанные данные кладутся в кэш с новым mtime, чтобы следующая загрузка
+    # файла не разбирала его заново
+    _YAML_CACHE[(path, False)] = (os.stat(path).st_mtime_ns, payload.decode('utf-8'), copy.deepcopy(data))
+
+
+def _yaml_sidecar_path(path: str) -> Path:
+    """Путь к файлу с сохраненным результатом разбора YAML"""
+    return Path(path + YAML_SIDECAR_SUFFIX)
+
+
+def _load_yaml_sidecar(path: str, content: str) -> Any:
+    """
+    Чтение сохраненного результата разбора YAML
+    
+    Результат принимается, только если хэш текста совпадает с сохраненным,
+    поэтому расхождение времени модификации файлов не приводит к устаревшим данным.
+    
+    Returns:
+        Результат разбора или None, если сохраненного результата нет или он устарел
+    """
+    try:
+        with open(_yaml_sidecar_path(path), 'rb') as file:
+            content_hash, data = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.debug(f"Не удалось прочитать кэш разбора {path}: {e}")
+        return None
+    if content_hash != hashlib.md5(content.encode('utf-8')).hexdigest():
+        return None
+    return data
+
+
+def _save_yaml_sidecar(path: str, content: str, data: Any):
+    """Атомарная запись результата разбора YAML рядом с файлом"""
+    sidecar = _yaml_sidecar_path(path)
+    tmp_path = sidecar.with_name(f"{sidecar.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as file:
+            pickle.dump((hashlib.md5(content.encode('utf-8')).hexdigest(), data), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, sidecar)
+    except Exception as e:
+        logger.debug(f"Не удалось сохранить кэш разбора {path}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+# Обязательные секции конфигурации
+REQUIRED_SECTIONS = ('data', 'neural_networks', 'trading', 'portfolio')
+
+
+def _is_non_empty_list(value) -> bool:
+    return isinstance(value, list) and len(value) > 0
+
+
+def _signal_threshold(trading_config: Dict[str, Any]):
+    return trading_config.get('signals', {}).get('min_confidence', trading_config.get('signal_threshold', 0.5))
+
+
+# Правила проверки, собранные один раз: (секция, извлечение значения, проверка, сообщение об ошибке)
+_VALIDATION_RULES = (
+    ('data', lambda section: section.get('symbols'), _is_non_empty_list,
+     "data.symbols должен быть непустым списком"),
+    ('data', lambda section: section.get('update_interval'),
+     lambda value: isinstance(value, (int, float)) and value >= 1,
+     "data.update_interval должен быть положительным числом"),
+    ('neural_networks', lambda section: section.get('models'), _is_non_empty_list,
+     "neural_networks.models должен быть непустым списком"),
+    ('trading', _signal_threshold,
+     lambda value: isinstance(value, (int, float)) and 0 <= value <= 1,
+     "trading.signals.min_confidence должен быть числом от 0 до 1"),
+)
+
+
+def validate_config(config: Dict[str, Any], partial: bool = False):
+    """
+    Проверка структуры конфигурации
+    
+    Args:
+        config: Конфигурация
+        partial: Проверять только присутствующие секции (для частичных обновлений)
+        
+    Raises:
+        ValueError: Если конфигурация не прошла проверку
+    """
+    if not config and not partial:
+        raise ValueError("Конфигурация не загружена")
+    
+    if not partial:
+        missing_sections = [s for s in REQUIRED_SECTIONS if s not in config]
+        if missing_sections:
+            raise ValueError(f"Отсутствуют обязательные секции конфигурации: {missing_sections}")
+    
+    for section_name, extract, check, message in _VALIDATION_RULES:
+        section = config.get(section_name)
+        if section is None and partial:
+            continue
+        if not check(extract(section or {})):
+            raise ValueError(message)
+
+
 class ConfigManager:
     """
     Менеджер для работы с конфигурационными файлами
@@ -24,6 +306,8 @@ class ConfigManager:
         """
         self.config_path = Path(config_path)
         self.config: Dict[str, Any] = {}
+        # Состояние конфигурации на момент последней загрузки/сохранения файла
+        self._saved_config: Optional[Dict[str, Any]] = None
         self._load_config()
         if validate:
             self._validate_config()
@@ -33,20 +317,17 @@ class ConfigManager:
         Загрузка конфигурации из файла
         """
         try:
-            if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                    # Подстановка переменных окружения
-                    content = self._substitute_env_vars(content)
-                    self.config = yaml.safe_load(content)
-                    if not self.config:
-                        raise ValueError("Конфигурация пуста или невалидна")
-                logger.info(f"Конфигурация загружена из {self.config_path}")
-            else:
-                logger.warning(f"Файл конфигурации {self.config_path} не найден")
-                self.config = self._get_default_config()
-                self._save_config()
-        except yaml.YAMLError as e:
+            # Подстановка переменных окружения выполняется перед разбором
+            self.config = load_yaml_file(self.config_path, self._substitute_env_vars)
+            if not self.config:
+                raise ValueError("Конфигурация пуста или невалидна")
+            self._saved_config = copy.deepcopy(self.config)
+            logger.info(f"Конфигурация загружена из {self.config_path}")
+        except FileNotFoundError:
+            logger.warning(f"Файл конфигурации {self.config_path} не найден")
+            self.config = self._get_default_config()
+            self._save_config()
+        except _yaml()[0].YAMLError as e:
             logger.error(f"Ошибка синтаксиса YAML в конфигурации: {e}")
             raise
         except Exception as e:
@@ -57,34 +338,7 @@ class ConfigManager:
         """
         Валидация загруженной конфигурации
         """
-        if not self.config:
-            raise ValueError("Конфигурация не загружена")
-        
-        # Проверка обязательных секций
-        required_sections = ['data', 'neural_networks', 'trading', 'portfolio']
-        missing_sections = [s for s in required_sections if s not in self.config]
-        if missing_sections:
-            raise ValueError(f"Отсутствуют обязательные секции конфигурации: {missing_sections}")
-        
-        # Валидация секции data
-        data_config = self.config.get('data', {})
-        if not isinstance(data_config.get('symbols'), list) or len(data_config.get('symbols', [])) == 0:
-            raise ValueError("data.symbols должен быть непустым списком")
-        
-        if not isinstance(data_config.get('update_interval'), (int, float)) or data_config.get('update_interval', 0) < 1:
-            raise ValueError("data.update_interval должен быть положительным числом")
-        
-        # Валидация секции neural_networks
-        nn_config = self.config.get('neural_networks', {})
-        if not isinstance(nn_config.get('models'), list) or len(nn_config.get('models', [])) == 0:
-            raise ValueError("neural_networks.models должен быть непустым списком")
-        
-        # Валидация секции trading
-        trading_config = self.config.get('trading', {})
-        signal_threshold = trading_config.get('signals', {}).get('min_confidence', trading_config.get('signal_threshold', 0.5))
-        if not isinstance(signal_threshold, (int, float)) or not (0 <= signal_threshold <= 1):
-            raise ValueError("trading.signals.min_confidence должен быть числом от 0 до 1")
-        
+        validate_config(self.config)
         logger.debug("Валидация конфигурации пройдена успешно")
     
     def _substitute_env_vars(self, content: str) -> str:
@@ -97,8 +351,6 @@ class ConfigManager:
         Returns:
             Контент с подставленными переменными окружения
         """
-        import re
-        
         def replace_env_var(match):
             var_name = match.group(1)
             default_value = match.group(2) if match.group(2) else ''
@@ -191,6 +443,9 @@ class ConfigManager:
             updates: Словарь с обновлениями
         """
         self._deep_update(self.config, updates)
+        if self.config == self._saved_config:
+            logger.debug("Конфигурация не изменилась, сохранение пропущено")
+            return
         self._save_config()
     
     def _deep_update(self, base_dict: Dict, update_dict: Dict):
@@ -213,8 +468,8 @@ class ConfigManager:
         """
         try:
             self.config_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.config_path, 'w', encoding='utf-8') as file:
-                yaml.dump(self.config, file, default_flow_style=False, allow_unicode=True)
+            dump_yaml_file(self.config_path, self.config)
+            self._saved_config = copy.deepcopy(self.config)
             logger.info(f"Конфигурация сохранена в {self.config_path}")
         except Exception as e:
             logger.error(f"Ошибка сохранения конфигурации: {e}")
@@ -5,9 +5,11 @@
 import os
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from loguru import logger
 
+from .config_manager import peek_yaml_header
+
 
 class ConfigSelector:
     """
@@ -77,6 +79,15 @@ class ConfigSelector:
             }
         }
     
+    def get_config_paths(self) -> List[Path]:
+        """
+        Получение путей к файлам предустановленных конфигураций
+        
+        Returns:
+            Список путей к файлам конфигураций
+        """
+        return [self.config_dir / config['file'] for config in self.configs.values()]
+    
     def show_menu(self) -> None:
         """
         Отображение меню выбора конфигурации
@@ -226,9 +237,15 @@ class ConfigSelector:
                         'path': config_path
                     }
             
-            # Если не найдена в списке, это пользовательская конфигурация
+            # Если не найдена в списке, это пользовательская конфигурация:
+            # имя системы берется из начала файла без полного разбора
+            system = peek_yaml_header(config_path).get('system')
+            if isinstance(system, dict) and system.get('name'):
+                name = f"Пользовательская конфигурация: {system['name']}"
+            else:
+                name = 'Пользовательская конфигурация'
             return {
-                'name': 'Пользовательская конфигурация',
+                'name': name,
                 'description': f'Конфигурация из файла {config_file}',
                 'features': ['Параметры определяются содержимым файла'],
                 'path': config_path
@@ -6,6 +6,7 @@
 import asyncio
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from loguru import logger
 from datetime import datetime
@@ -16,6 +17,10 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.utils.command_manager import CommandManager, CommandType
 
+# Отдельный поток для чтения ввода: блокирующий input() не занимает
+# потоки пула по умолчанию, которые использует asyncio.to_thread
+_INPUT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="console-input")
+
 class InteractiveConsole:
     """
     Интерактивная консоль для управления системой
@@ -26,6 +31,8 @@ class InteractiveConsole:
         self.running = False
         self.system = None
         self.portfolio = None
+        # Цикл событий консоли: определяется один раз при запуске
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
     
     def set_system_components(self, system=None, portfolio=None):
         """Установка компонентов системы"""
@@ -37,6 +44,7 @@ class InteractiveConsole:
     async def start(self):
         """Запуск интерактивной консоли"""
         self.running = True
+        self._loop = asyncio.get_running_loop()
         
         print("\n" + "="*70)
         print("🚀 NEYRO-INVEST INTERACTIVE CONSOLE")
@@ -78,8 +86,7 @@ class InteractiveConsole:
         """Получение ввода от пользователя"""
         try:
             # Используем asyncio для неблокирующего ввода
-            loop = asyncio.get_event_loop()
-            user_input = await loop.run_in_executor(None, input, "neyro-invest> ")
+            user_input = await self._loop.run_in_executor(_INPUT_EXECUTOR, input, "neyro-invest> ")
             return user_input.strip()
         except EOFError:
             return "exit"
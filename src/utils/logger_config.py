@@ -4,9 +4,28 @@
 """
 
 import sys
+from functools import partial
 from pathlib import Path
 from loguru import logger
 
+
+def name_contains(keywords, record) -> bool:
+    """
+    Фильтр loguru: имя модуля записи содержит одно из ключевых слов
+
+    Используется через functools.partial(name_contains, (...)) вместо
+    отдельной lambda на каждый обработчик
+
+    Args:
+        keywords: Кортеж ключевых слов в нижнем регистре
+        record: Запись loguru
+    """
+    name = record["name"].lower()
+    for keyword in keywords:
+        if keyword in name:
+            return True
+    return False
+
 def setup_logging():
     """Настройка логирования с поддержкой UTF-8"""
     
@@ -41,7 +60,7 @@ def setup_logging():
         retention="3 days",
         level="INFO",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-        filter=lambda record: "trading" in record["name"].lower() or "broker" in record["name"].lower(),
+        filter=partial(name_contains, ("trading", "broker")),
         delay=True  # Файл создается только при первой записи, проходящей через фильтр
     )
     
@@ -52,7 +71,7 @@ def setup_logging():
         retention="3 days",
         level="INFO",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} - {message}",
-        filter=lambda record: "neural" in record["name"].lower() or "network" in record["name"].lower(),
+        filter=partial(name_contains, ("neural", "network")),
         delay=True  # Файл создается только при первой записи, проходящей через фильтр
     )
     